@@ -0,0 +1,117 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""
+Benchmarks of the memory held per sensor node and per link object.
+
+The objects are created in bulk while tracing the allocations, so the bytes per object include their
+attributes. Links are measured with a propagation model of their own and sharing one model, as the
+networks create them. The peak memory allocated by one step of the matrix engine is measured in double
+and single precision. The results are written as JSON together with the commit and the versions:
+
+	python -m benchmarks.bench_memory --output memory.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+import numpy as np
+
+from wsntk.network import RadioLink, SensorNetwork, SensorNode
+
+COUNT = 100000
+LOSSES = ("FSPL", "LDPL", "TSPL")
+DTYPES = ("float64", "float32")
+
+def _commit():
+	"""Get the commit of the working tree, if any."""
+	try:
+		return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr = subprocess.DEVNULL, text = True).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+def _traced(create, count):
+	"""Measure the bytes allocated per object by `count` calls of `create`, which are kept alive."""
+	tracemalloc.start()
+	before, _ = tracemalloc.get_traced_memory()
+	objects = [create(i) for i in range(count)]
+	after, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	del objects
+	return (after - before)/count
+
+def bench_links(count):
+	"""Measure the bytes per link object, with its own propagation model and with a shared one."""
+	results = {}
+	for loss in LOSSES:
+		model = RadioLink._init_link(loss, 1.0, 10.0, 8.7, 2.2, 3.3)
+		results[loss] = {
+			"own_model_bytes": _traced(lambda i: RadioLink(0.0, -90.0, float(i), 2.4e9, loss, sigma = 8.7), count),
+			"shared_model_bytes": _traced(lambda i: RadioLink(0.0, -90.0, float(i), 2.4e9, model = model), count),
+		}
+	return results
+
+def bench_network(nr_sensors, seed):
+	"""Measure the bytes per sensor node and per link object of a network with every link created."""
+	net = SensorNetwork(nr_sensors, (100, 100), loss = "LDPL", sigma = 8.7, seed = seed)
+	tracemalloc.start()
+	before, _ = tracemalloc.get_traced_memory()
+	links = [net.links[rx, tx] for rx in range(nr_sensors) for tx in range(nr_sensors) if rx != tx]
+	after, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	memory = net._nbytes()
+	return {
+		"nr_sensors": nr_sensors,
+		"state_bytes_per_node": memory["sensors"]/nr_sensors,
+		"view_bytes_per_node": _traced(lambda i: SensorNode.view(net.dimensions, net.state, i % nr_sensors, net.cons_model), nr_sensors*100),
+		"link_bytes_per_link": (after - before)/len(links),
+	}
+
+def bench_steps(nr_sensors, seed):
+	"""Measure the peak bytes allocated by one step of a moving matrix network, in each precision."""
+	results = {"nr_sensors": nr_sensors}
+	for dtype in DTYPES:
+		net = SensorNetwork(nr_sensors, (1000, 1000), loss = "LDPL", sigma = 8.7, engine = "matrix", mobility = "RandomWalk", dtype = dtype, seed = seed)
+		net.advance(1)
+		tracemalloc.start()
+		net.advance(1)
+		_, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		results[dtype] = {"step_peak_bytes": peak, "step_peak_bytes_per_link": peak/nr_sensors**2, "links_bytes": net._nbytes()["links"]}
+	return results
+
+def main(argv = None):
+	parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+	parser.add_argument("--count", type = int, default = COUNT, help = "link objects created per measure")
+	parser.add_argument("--sizes", type = int, nargs = "+", default = [100, 300], help = "numbers of sensors of the networks")
+	parser.add_argument("--step-sizes", type = int, nargs = "+", default = [2000], help = "numbers of sensors of the matrix networks whose steps are measured")
+	parser.add_argument("--seed", type = int, default = 0)
+	parser.add_argument("--output", help = "path of the JSON results, printed when omitted")
+	args = parser.parse_args(argv)
+
+	results = {
+		"commit": _commit(),
+		"python": platform.python_version(),
+		"numpy": np.__version__,
+		"platform": platform.platform(),
+		"time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"links": bench_links(args.count),
+		"networks": [bench_network(nr_sensors, args.seed) for nr_sensors in args.sizes],
+		"steps": [bench_steps(nr_sensors, args.seed) for nr_sensors in args.step_sizes],
+	}
+
+	if args.output is None:
+		print(json.dumps(results, indent = 1))
+	else:
+		with open(args.output, "w") as file:
+			json.dump(results, file, indent = 1)
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,178 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""
+Benchmarks of sensor network construction and simulation steps.
+
+Each configuration of the grid is built and run in a fresh network, with a fixed seed, and measured
+for its construction time and its steps per second. The peak memory allocated by the run is measured
+in a second run of the same network with the allocations traced, since tracing slows down the steps.
+The propagation models are also measured on their own, per link and for arrays of links. The results are
+written as JSON together with the commit and the versions, so two commits are compared by running the
+suite on each of them:
+
+	python -m benchmarks.bench_network --output before.json
+	python -m benchmarks.bench_network --quick --sizes 10 100 --engines matrix
+
+Run from the root of the repository, ``-m`` makes the ``wsntk`` package of the working tree importable
+without installing it.
+
+The deployment area grows with the number of sensors and the radio range of the configuration, so each
+sensor has the same expected number of sensors within radio range, see --degree. Engines are skipped
+above the size they can hold in memory, see --max-size.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from wsntk.models import FreeSpace, LogDistance, TwoSlope
+from wsntk.network import SensorNetwork, RADIO_CONFIG
+from wsntk.simulator import parameter_grid
+
+SIZES = (10, 100, 1000, 10000)
+QUICK_SIZES = (10, 30)
+LOSSES = {
+	"FSPL": (FreeSpace, {}),
+	"LDPL": (LogDistance, {"sigma": 8.7, "n0": 2.2}),
+	"TSPL": (TwoSlope, {"sigma": 8.7, "n0": 2.2, "n1": 3.3}),
+}
+#the largest network of each engine, the loop engine evaluates one link object per pair in Python
+MAX_SIZE = {"loop": 300, "matrix": 2000, "sparse": 10000}
+
+def _commit():
+	"""Get the commit of the working tree, if any."""
+	try:
+		return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr = subprocess.DEVNULL, text = True).strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+def _side(nr_sensors, loss, radio, degree):
+	"""Calculate the side of a square area where each sensor has `degree` sensors within radio range on average."""
+	model_class, params = LOSSES[loss]
+	model = model_class(**params)
+	config = RADIO_CONFIG[radio]
+	#the radio range of the sparse engine, with its default shadowing margin
+	budget = config["max_tx_power"] - config["rx_sensitivity"] + 3.0*model.sigma
+	radius = model.max_distance(budget, config["frequency"])
+	return radius*np.sqrt(np.pi*nr_sensors/degree)
+
+def bench_network(nr_sensors, engine, loss, radio, consumption, steps, seed, degree, dtype = "float64"):
+	"""Measure the construction and the steps of one network."""
+	side = _side(nr_sensors, loss, radio, degree)
+	params = dict(LOSSES[loss][1], loss = loss, radio = radio, consumption = consumption, scaling = 20.0, engine = engine, seed = seed, dtype = dtype)
+
+	start = time.perf_counter()
+	net = SensorNetwork(nr_sensors, (side, side), **params)
+	construction = time.perf_counter() - start
+
+	iterator = iter(net)
+	start = time.perf_counter()
+	for _ in range(steps):
+		next(iterator)
+	elapsed = time.perf_counter() - start
+
+	#the same run again, with the allocations traced
+	tracemalloc.start()
+	iterator = iter(SensorNetwork(nr_sensors, (side, side), **params))
+	for _ in range(steps):
+		next(iterator)
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	return {
+		"construction_s": construction,
+		"steps": steps,
+		"steps_per_s": steps/elapsed if elapsed > 0 else None,
+		"peak_memory_bytes": peak,
+	}
+
+def bench_propagation(calls, size):
+	"""Measure the loss of the propagation models, one link per call and for an array of links."""
+	rng = np.random.default_rng(0)
+	distance = rng.uniform(1, 1000, size)
+	results = {}
+	for name, model in (("FSPL", FreeSpace()), ("LDPL", LogDistance(sigma = 8.7, rng = rng)), ("TSPL", TwoSlope(sigma = 8.7, rng = rng))):
+		start = time.perf_counter()
+		for value in distance[:calls]:
+			model.loss(value, 2.4e9)
+		scalar = time.perf_counter() - start
+
+		start = time.perf_counter()
+		model.loss(distance, 2.4e9)
+		vector = time.perf_counter() - start
+
+		results[name] = {"scalar_calls_per_s": calls/scalar, "array_links_per_s": size/vector}
+	return results
+
+def main(argv = None):
+	parser = argparse.ArgumentParser(description = __doc__.strip().splitlines()[0])
+	parser.add_argument("--sizes", type = int, nargs = "+", help = "numbers of sensors, %s by default" % (SIZES,))
+	parser.add_argument("--engines", nargs = "+", default = list(MAX_SIZE), choices = list(MAX_SIZE), help = "link engines")
+	parser.add_argument("--losses", nargs = "+", default = list(LOSSES), choices = list(LOSSES), help = "propagation models")
+	parser.add_argument("--radios", nargs = "+", default = list(RADIO_CONFIG), choices = list(RADIO_CONFIG), help = "radios")
+	parser.add_argument("--consumptions", nargs = "+", default = ["None", "Exponential"], help = "consumption models")
+	parser.add_argument("--steps", type = int, default = 20, help = "steps run by each network")
+	parser.add_argument("--degree", type = float, default = 20.0, help = "expected number of sensors within radio range of each sensor")
+	parser.add_argument("--max-size", type = json.loads, default = {}, help = "JSON object overriding the largest network of each engine")
+	parser.add_argument("--dtype", default = "float64", choices = ["float64", "float32"], help = "precision of the state and links of the networks")
+	parser.add_argument("--seed", type = int, default = 0)
+	parser.add_argument("--quick", action = "store_true", help = "small sizes and few steps, as a smoke test")
+	parser.add_argument("--output", help = "path of the JSON results, printed when omitted")
+	args = parser.parse_args(argv)
+
+	if args.sizes is None:
+		args.sizes = QUICK_SIZES if args.quick else SIZES
+	if args.quick:
+		args.steps = min(args.steps, 3)
+	max_size = dict(MAX_SIZE, **args.max_size)
+
+	grid = parameter_grid({
+		"nr_sensors": args.sizes,
+		"engine": args.engines,
+		"loss": args.losses,
+		"radio": args.radios,
+		"consumption": args.consumptions,
+	})
+
+	runs = []
+	for params in grid:
+		run = dict(params)
+		if params["nr_sensors"] > max_size[params["engine"]]:
+			run["skipped"] = True
+		else:
+			run.update(bench_network(steps = args.steps, seed = args.seed, degree = args.degree, dtype = args.dtype, **params))
+			print("%(nr_sensors)6d %(engine)-7s %(loss)s %(radio)-16s %(consumption)-12s" % params,
+				"%10.4f s %10.1f steps/s %12d B" % (run["construction_s"], run["steps_per_s"] or 0, run["peak_memory_bytes"]), file = sys.stderr)
+		runs.append(run)
+
+	results = {
+		"commit": _commit(),
+		"python": platform.python_version(),
+		"numpy": np.__version__,
+		"platform": platform.platform(),
+		"time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+		"steps": args.steps,
+		"seed": args.seed,
+		"degree": args.degree,
+		"dtype": args.dtype,
+		"networks": runs,
+		"propagation": bench_propagation(10000 if not args.quick else 1000, 1000000 if not args.quick else 10000),
+	}
+
+	if args.output is None:
+		print(json.dumps(results, indent = 1))
+	else:
+		with open(args.output, "w") as file:
+			json.dump(results, file, indent = 1)
+
+if __name__ == "__main__":
+	main()
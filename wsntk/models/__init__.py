@@ -1,4 +1,5 @@
 from .propagation import FreeSpace, LogDistance, TwoSlope
 from .consumption import NoConsumption, ExponentialConsumption
+from .mobility import BaseMobilityModel, NoMobility, RandomWalk, RandomWaypoint, GaussMarkov
 
-__all__ = ['FreeSpace', 'LogDistance', 'TwoSlope', 'NoConsumption', 'ExponentialConsumption']
\ No newline at end of file
+__all__ = ['FreeSpace', 'LogDistance', 'TwoSlope', 'NoConsumption', 'ExponentialConsumption', 'BaseMobilityModel', 'NoMobility', 'RandomWalk', 'RandomWaypoint', 'GaussMarkov']
@@ -8,11 +8,12 @@
 
 from abc import ABCMeta, abstractmethod
 import numpy as np
-import math
 
 class BaseConsumptionModel(metaclass=ABCMeta):
 	"""Base class for propagation loss models."""
 
+	__slots__ = ()
+
 	def __init__(self):
 		pass
 	
@@ -20,11 +21,70 @@ class BaseConsumptionModel(metaclass=ABCMeta):
 	def consumption(self, tx_power):
 		"""Calculate the consumption based on the consumption model."""
 		raise NotImplementedError
+	
+	def decay(self, tx_power, steps):
+		"""
+		Calculate the factor applied to the residual energy by several steps at a constant transmission power
+		
+		Parameters
+		----------
+		tx_power: double or array_like
+			The transmission power in dBm.  
+		
+		steps: integer or array_like
+			The number of steps.
+		
+		Returns
+		-------
+		double or ndarray
+			The product of the consumption of `steps` steps.
+		"""
+		return np.asarray(self.consumption(tx_power), dtype = float)**np.asarray(steps)
+	
+	def steps_to_threshold(self, residual, tx_power, threshold):
+		"""
+		Calculate the number of steps until the residual energy is no longer above a threshold
+		
+		Parameters
+		----------
+		residual: double or array_like
+			The current residual energy.
+		
+		tx_power: double or array_like
+			The transmission power in dBm.  
+		
+		threshold: double
+			The energy threshold, usually the minimum energy of an active sensor.
+		
+		Returns
+		-------
+		double or ndarray
+			The smallest number of steps `k` such that ``residual*decay(tx_power, k) <= threshold``, 
+			0 if the residual is already below the threshold and ``np.inf`` if it is never reached.
+		"""
+		residual, tx_power = np.broadcast_arrays(np.asarray(residual, dtype = float), np.asarray(tx_power, dtype = float))
+		factor = np.broadcast_to(self.consumption(tx_power), residual.shape)
+		steps = np.full(residual.shape, np.inf)
+		steps[residual <= threshold] = 0
+		
+		#the residual decreases at a constant rate
+		decreasing = (residual > threshold) & (factor < 1) & (factor > 0)
+		residual, tx_power = residual[decreasing], tx_power[decreasing]
+		estimate = np.maximum(np.ceil(np.log(threshold/residual)/np.log(factor[decreasing])), 1)
+		#the rounding of the logarithms may put the estimate one step away from the decay
+		estimate[(estimate > 1) & (residual*self.decay(tx_power, estimate - 1) <= threshold)] -= 1
+		estimate[residual*self.decay(tx_power, estimate) > threshold] += 1
+		steps[decreasing] = estimate
+		steps[(steps == np.inf) & (factor <= 0)] = 1
+		
+		return steps[()]
 		
 
 class NoConsumption(BaseConsumptionModel):
 	"""Class for no consumption models."""
 
+	__slots__ = ()
+
 	def __init__(self):
 		super(NoConsumption, self).__init__()
 		
@@ -51,6 +111,8 @@ class NoConsumption(BaseConsumptionModel):
 class ExponentialConsumption(BaseConsumptionModel):
 	"""Class for contant consumption models."""
 
+	__slots__ = ("scaling",)
+
 	def __init__(self, scaling = 1.0):
 		
 		self.scaling = scaling
@@ -68,16 +130,38 @@ class ExponentialConsumption(BaseConsumptionModel):
 		Parameters
 		----------
 		
-		tx_power: double
+		tx_power: double or array_like
 			The transmission power in dBm.  
 		
 		Returns
 		-------
-		double
+		double or ndarray
 			The exponential decay constant calculated for `tx_power`.
 		"""
 		
 		#converts the power from dBm to watts
-		power_w = (10**(tx_power/10))*0.001	
-		return math.exp(-self.scaling*power_w)
+		power_w = (10**(np.asarray(tx_power)/10))*0.001	
+		return np.exp(-self.scaling*power_w)
+	
+	def decay(self, tx_power, steps):
+		"""
+		Calculate the factor applied to the residual energy by several steps at a constant transmission power
+		
+			decay = exp(-power_w*scaling*steps)
+		
+		Parameters
+		----------
+		tx_power: double or array_like
+			The transmission power in dBm.  
+		
+		steps: integer or array_like
+			The number of steps.
+		
+		Returns
+		-------
+		double or ndarray
+			The exponential decay of `steps` steps.
+		"""
+		power_w = (10**(np.asarray(tx_power)/10))*0.001
+		return np.exp(-self.scaling*power_w*np.asarray(steps))
 		
\ No newline at end of file
@@ -0,0 +1,200 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""Mobility models."""
+
+from abc import ABCMeta, abstractmethod
+import numpy as np
+
+class BaseMobilityModel(metaclass=ABCMeta):
+	"""
+	Base class for mobility models.
+
+	The models move all sensors at once: positions are arrays (..., N, ndim) updated in place.
+	Sensors leaving the area are reflected by its borders or wrapped around it.
+	"""
+
+	__slots__ = ("speed", "boundary", "rng")
+
+	boundaries = ("reflect", "wrap")
+	mobile = True
+	#attributes that change along the simulation, saved by checkpoints
+	state_attributes = ()
+
+	def __init__(self, speed = 1.0, boundary = "reflect", rng = None):
+
+		if boundary not in self.boundaries:
+			raise ValueError("The boundary %s is not supported. " % boundary)
+		self.speed = speed
+		self.boundary = boundary
+		#without a generator the global numpy generator is used
+		self.rng = np.random if rng is None else rng
+
+	def _direction(self, shape):
+		"""Draw unit vectors with uniformly distributed directions."""
+		direction = self.rng.normal(0, 1, shape)
+		norm = np.sqrt(np.sum(direction**2, axis = -1, keepdims = True))
+		return direction/np.where(norm > 0, norm, 1)
+
+	def _bound(self, positions, dimensions):
+		"""
+		Bring the positions back into the area, in place
+
+		Parameters
+		----------
+		positions : {ndarray}
+			Array (..., N, ndim) with the position of each sensor
+
+		dimensions : {array_like}
+			The size of the area along each dimension
+
+		Returns
+		-------
+		ndarray of booleans
+			The coordinates reflected an odd number of times, whose direction of motion is reversed
+		"""
+		if self.boundary == "wrap":
+			np.mod(positions, dimensions, out = positions)
+			return np.zeros(positions.shape, dtype = bool)
+
+		#a reflection is a wrap around an area twice as large, mirrored in its second half
+		reversed_ = np.floor_divide(positions, dimensions) % 2 == 1
+		np.mod(positions, 2*dimensions, out = positions)
+		np.subtract(2*dimensions, positions, out = positions, where = positions > dimensions)
+		return reversed_
+
+	def move(self, positions, dimensions):
+		"""
+		Move all sensors one step, in place
+
+		Parameters
+		----------
+		positions : {ndarray}
+			Array (..., N, ndim) with the position of each sensor
+
+		dimensions : {array_like}
+			The size of the area along each dimension
+
+		Returns
+		-------
+		ndarray
+			The updated `positions`
+		"""
+		dimensions = np.asarray(dimensions, dtype = float)
+		positions += self._displacement(positions, dimensions)
+		self._reverse(self._bound(positions, dimensions))
+		return positions
+
+	@abstractmethod
+	def _displacement(self, positions, dimensions):
+		"""Calculate the displacement of each sensor in one step."""
+		raise NotImplementedError
+
+	def _reverse(self, reversed_):
+		"""Reverse the direction of motion of the reflected coordinates."""
+		pass
+
+
+class NoMobility(BaseMobilityModel):
+	"""Class for static sensors."""
+
+	__slots__ = ()
+
+	mobile = False
+
+	def __init__(self, rng = None):
+		super(NoMobility, self).__init__(0.0, "reflect", rng)
+
+	def move(self, positions, dimensions):
+		"""The sensors do not move, `positions` is returned unchanged."""
+		return positions
+
+	def _displacement(self, positions, dimensions):
+		return np.zeros(positions.shape)
+
+
+class RandomWalk(BaseMobilityModel):
+	"""
+	Class for the random walk mobility model.
+
+	Each step, every sensor moves `speed` meters in a new direction drawn uniformly at random.
+	"""
+
+	__slots__ = ()
+
+	def __init__(self, speed = 1.0, boundary = "reflect", rng = None):
+		super(RandomWalk, self).__init__(speed, boundary, rng)
+
+	def _displacement(self, positions, dimensions):
+		return self.speed*self._direction(positions.shape)
+
+
+class RandomWaypoint(BaseMobilityModel):
+	"""
+	Class for the random waypoint mobility model.
+
+	Every sensor moves `speed` meters per step in a straight line towards its waypoint, drawn uniformly
+	at random in the area. A new waypoint is drawn when the sensor arrives. The sensors never leave the area.
+	"""
+
+	__slots__ = ("waypoints",)
+
+	state_attributes = ("waypoints",)
+
+	def __init__(self, speed = 1.0, boundary = "reflect", rng = None):
+		super(RandomWaypoint, self).__init__(speed, boundary, rng)
+		self.waypoints = None
+
+	def _displacement(self, positions, dimensions):
+		if self.waypoints is None or self.waypoints.shape != positions.shape:
+			self.waypoints = self.rng.random(positions.shape)*dimensions
+
+		delta = self.waypoints - positions
+		distance = np.sqrt(np.sum(delta**2, axis = -1, keepdims = True))
+		arrived = distance[..., 0] <= self.speed
+
+		#the sensors that arrive stop at their waypoint and draw the next one
+		displacement = np.where(distance <= self.speed, delta, self.speed*delta/np.where(distance > 0, distance, 1))
+		self.waypoints[arrived] = self.rng.random((np.count_nonzero(arrived), positions.shape[-1]))*dimensions
+		return displacement
+
+
+class GaussMarkov(BaseMobilityModel):
+	"""
+	Class for the Gauss-Markov mobility model.
+
+	The velocity of each sensor is a first order autoregressive process around a mean velocity of
+	`speed` meters per step in a direction drawn at random for each sensor:
+
+		velocity = alpha*velocity + (1 - alpha)*mean + sqrt(1 - alpha**2)*sigma*normal
+
+	With `alpha` 0 the motion is a Brownian motion around the mean velocity, with `alpha` 1 it is linear.
+	A reflected sensor reverses its velocity and mean velocity.
+	"""
+
+	__slots__ = ("alpha", "sigma", "velocity", "mean")
+
+	state_attributes = ("velocity", "mean")
+
+	def __init__(self, speed = 1.0, alpha = 0.75, sigma = None, boundary = "reflect", rng = None):
+		super(GaussMarkov, self).__init__(speed, boundary, rng)
+		self.alpha = alpha
+		self.sigma = speed if sigma is None else sigma
+		self.velocity = None
+		self.mean = None
+
+	def _displacement(self, positions, dimensions):
+		if self.velocity is None or self.velocity.shape != positions.shape:
+			self.mean = self.speed*self._direction(positions.shape)
+			self.velocity = self.mean.copy()
+
+		noise = self.rng.normal(0, 1, positions.shape)
+		self.velocity = self.alpha*self.velocity + (1 - self.alpha)*self.mean + np.sqrt(1 - self.alpha**2)*self.sigma*noise
+		return self.velocity
+
+	def _reverse(self, reversed_):
+		self.velocity[reversed_] *= -1
+		self.mean[reversed_] *= -1
@@ -7,17 +7,51 @@
 """Path loss models."""
 
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
 import numpy as np
 import math
+import sys
 
 DEFAULT_C = 2.998e8
 MIN_LOSS = 0
+#number of frequencies whose reference losses are kept in the cache of a model
+CACHE_SIZE = 16
+#types of the distances and frequencies of a single link evaluated without numpy arrays, 
+#numpy doubles are floats while single precision scalars keep the array path
+SCALAR_TYPES = (int, float)
 
 class BasePropagationModel(metaclass=ABCMeta):
 	"""Base class for propagation loss models."""
 
-	def __init__(self):
-		pass
+	__slots__ = ("rng", "cache_size", "version", "_cache")
+
+	#standard deviation of the shadowing, models without shadowing keep it at zero
+	sigma = 0.0
+	
+	#parameters of the reference losses, setting one of them clears the cache
+	parameters = ()
+
+	def __init__(self, rng = None):
+		#random generator used for shadowing, the global numpy generator by default
+		self.rng = np.random if rng is None else rng
+		#reference losses by frequency, least recently used first
+		self.cache_size = CACHE_SIZE
+		self._cache = OrderedDict()
+		#incremented whenever the losses of the model change, links caching them compare it
+		self.version = 0
+	
+	def __setattr__(self, name, value):
+		super(BasePropagationModel, self).__setattr__(name, value)
+		#the parameters are set before the cache is created
+		if name in self.parameters and hasattr(self, "_cache"):
+			self._cache.clear()
+		if (name in self.parameters or name == "sigma") and hasattr(self, "version"):
+			super(BasePropagationModel, self).__setattr__("version", self.version + 1)
+	
+	@property
+	def deterministic(self):
+		"""True when the model has no shadowing, so the loss only depends on distance and frequency."""
+		return not self.sigma > 0
 	
 	def _friis_loss(self, distance, frequency):
 		"""
@@ -28,33 +62,246 @@ class BasePropagationModel(metaclass=ABCMeta):
 				
 		Parameters
 		----------
-		distance : double
+		distance : double or ndarray
 		   The distance (m).
 		
-		frequency: double
+		frequency: double or ndarray
 			The frequency of operation (Hz).  
 		
 		Returns
 		-------
-		double
+		double or ndarray
 			The Friss loss in decibels [dBm] evaluated for `distance` and `frequency`.
 		"""
 		Gr=1
 		Gt=1
 				
-		return 10*math.log10(Gr*Gt*((4*math.pi*distance*frequency)/DEFAULT_C)**2) 
+		return 10*np.log10(Gr*Gt*((4*math.pi*distance*frequency)/DEFAULT_C)**2) 
+	
+	def _reference_loss(self, frequency):
+		"""
+		Calculate the terms of the path loss which only depend on the model parameters and frequency.
+		
+		Formula:
+				K = 20*log10((4*pi*f)/c)
+				
+		so that the Friss loss is PL0 = 20*log10(d) + K.
+		
+		Parameters
+		----------
+		frequency: double
+			The frequency of operation (Hz).  
+		
+		Returns
+		-------
+		tuple of double
+			The reference losses of the model, starting with `K`.
+		"""
+		return (20*math.log10((4*math.pi*frequency)/DEFAULT_C),)
+	
+	def _constants(self, frequency):
+		"""Get the reference losses of `frequency` from the cache, calculating them when missing."""
+		frequency = float(frequency)
+		try:
+			self._cache.move_to_end(frequency)
+		except KeyError:
+			self._cache[frequency] = self._reference_loss(frequency)
+			if len(self._cache) > self.cache_size:
+				self._cache.popitem(last = False)
+		return self._cache[frequency]
+	
+	def _reference(self, frequency, mask, term):
+		"""
+		Get one of the reference losses for each link selected by a mask.
+		
+		Parameters
+		----------
+		frequency: ndarray
+			The frequency of operation of each link (Hz), or a 0-d array when all links share it.  
+		
+		mask: ndarray of bool
+			The links selected, in the shape of the links.
+		
+		term: int
+			The position of the reference loss in the tuple returned by ``_reference_loss``.
+		
+		Returns
+		-------
+		double or ndarray
+			A single value when all links share the same frequency, otherwise one value per link.
+		"""
+		if frequency.ndim == 0:
+			return self._constants(frequency)[term]
+		
+		frequency = frequency[mask]
+		if frequency.size == 0:
+			return 0.0
+		
+		first = frequency.flat[0]
+		if np.all(frequency == first):
+			return self._constants(first)[term]
+		
+		#heterogeneous radios, one cache lookup per distinct frequency
+		unique, inverse = np.unique(frequency, return_inverse = True)
+		table = np.array([self._constants(value)[term] for value in unique])
+		return table[inverse.reshape(frequency.shape)]
+	
+	def _broadcast(self, distance, frequency):
+		"""
+		Convert `distance` and `frequency` to arrays of a common shape.
+		
+		Scalars become 0-d arrays, so a single link and a whole set of links share the same code path. 
+		Single precision distances keep their precision, so are the losses calculated from them. A 
+		frequency shared by all links is returned as a 0-d array instead of being broadcast.
+		
+		Parameters
+		----------
+		distance : double or array_like
+		   The distance (m).
+		
+		frequency: double or array_like
+			The frequency of operation (Hz).  
+		
+		Returns
+		-------
+		tuple of ndarray
+			The broadcasted `distance` and `frequency` arrays.
+		"""
+		distance = np.asarray(distance)
+		distance = distance.astype(np.float32 if distance.dtype == np.float32 else float, copy = False)
+		frequency = np.asarray(frequency, dtype = float)
+		if frequency.size and np.all(frequency == frequency.flat[0]):
+			#the usual case of a single radio, the frequency is not repeated for every link
+			distance = np.broadcast_to(distance, np.broadcast_shapes(distance.shape, frequency.shape))
+			return distance, np.asarray(frequency.flat[0])
+		return np.broadcast_arrays(distance, frequency)
+	
+	def _scalar(self, distance, frequency):
+		"""Check if `distance` and `frequency` are the Python scalars of a single link."""
+		return isinstance(distance, SCALAR_TYPES) and isinstance(frequency, SCALAR_TYPES)
+	
+	def _scalar_loss(self, distance, frequency):
+		"""Calculate the path loss of a single link on scalars and a single draw of shadowing."""
+		L = self._scalar_mean_loss(distance, frequency)
+		if self.deterministic:
+			return L
+		return L + self.rng.normal(0, self.sigma)
+	
+	def _log10(self, distance):
+		"""Calculate log10 of distances clipped to the smallest positive value of their type, so coincident sensors give a finite loss."""
+		return np.log10(np.maximum(distance, np.finfo(distance.dtype).tiny))
+		
+	def shadowing(self, shape):
+		"""
+		Draw the shadowing (large-scale fading) term for a block of links.
+		
+		All links are drawn at once from `rng`, in C order, which is the same sequence obtained by calling 
+		the model once per link.
+		
+		Parameters
+		----------
+		shape : tuple of int or None
+		   The shape of the block of links, a single link when None.
+		
+		Returns
+		-------
+		double or ndarray
+			Normal samples with zero mean and standard deviation `sigma`, a double when `shape` is None. 
+			Deterministic models return zeros without drawing from `rng`.
+		"""
+		if self.deterministic:
+			return 0.0 if shape is None else np.zeros(shape)
+		return self.rng.normal(0, self.sigma, shape)
+		
+	def _friis_distance(self, loss, frequency):
+		"""
+		Calculate the distance at which the Friss propagation loss reaches `loss`.
+		
+		Formula:
+				d = (c/(4*pi*f))*10^(PL0/20)
+		
+		Parameters
+		----------
+		loss : double
+		   The path loss [dB].
+		
+		frequency: double
+			The frequency of operation (Hz).  
 		
+		Returns
+		-------
+		double
+			The distance (m) for which the Friss loss is equal to `loss`.
+		"""
+		return (DEFAULT_C/(4*math.pi*frequency))*10**(loss/20)
+	
+	@abstractmethod
+	def _mean_loss(self, distance, frequency):
+		"""Calculate the path loss without shadowing for broadcasted `distance` and `frequency` arrays."""
+		raise NotImplementedError
+	
+	@abstractmethod
+	def _scalar_mean_loss(self, distance, frequency):
+		"""Calculate the path loss without shadowing of a single link given as Python scalars."""
+		raise NotImplementedError
+	
+	def mean_loss(self, distance, frequency):
+		"""
+		Calculate the deterministic part of the link loss, that is, the loss without shadowing.
+		
+		Parameters
+		----------
+		distance : double or array_like
+		   The distance between two nodes (m).
+		
+		frequency: double or array_like
+			The frequency of operation (Hz).  
+		
+		Returns
+		-------
+		double or ndarray
+			The loss without shadowing evaluated for `distance` and `frequency`.
+		"""
+		if self._scalar(distance, frequency):
+			return self._scalar_mean_loss(distance, frequency)
+		distance, frequency = self._broadcast(distance, frequency)
+		return self._mean_loss(distance, frequency)[()]
+	
 	@abstractmethod
 	def loss(self, distance, frequency):
 		"""Calculate the path loss."""
 		raise NotImplementedError
+	
+	def max_distance(self, loss, frequency):
+		"""
+		Calculate the largest distance at which the deterministic part of the path loss does not exceed `loss`.
+		
+		Used to bound the radio range of a link budget. Shadowing is not considered and must be 
+		accounted for by the caller by adding a margin to `loss`.
+		
+		Parameters
+		----------
+		loss : double
+		   The maximum path loss [dB], usually max_tx_power - rx_sensitivity.
+		
+		frequency: double
+			The frequency of operation (Hz).  
+		
+		Returns
+		-------
+		double
+			The maximum distance (m).
+		"""
+		raise NotImplementedError
 		
 
 class FreeSpace(BasePropagationModel):
 	"""Class for Log-nomal propagation models."""
 
-	def __init__(self):
-		super(FreeSpace).__init__()
+	__slots__ = ()
+
+	def __init__(self, rng = None):
+		super(FreeSpace, self).__init__(rng)
 		
 	def loss(self, distance, frequency):
 		"""
@@ -65,33 +312,56 @@ class FreeSpace(BasePropagationModel):
 		
 		Parameters
 		----------
-		distance : double
+		distance : double or array_like
 		   The distance between two nodes (m).
 		
-		frequency: double
+		frequency: double or array_like
 			The frequency of operation (Hz).  
 		
 		Returns
 		-------
-		double
-			The loss evaluated for `distance` and `frequency`.
+		double or ndarray
+			The loss evaluated for `distance` and `frequency`. An array is returned when any of the inputs is an array.
 		"""
-		if distance > 0.1:
-			L = self._friis_loss(distance, frequency)
-		else:
-			L = MIN_LOSS
+		if self._scalar(distance, frequency):
+			return self._scalar_mean_loss(distance, frequency)
+		distance, frequency = self._broadcast(distance, frequency)
 			
+		return self._mean_loss(distance, frequency)[()]
+	
+	def _mean_loss(self, distance, frequency):
+		"""Calculate the free-space loss for broadcasted `distance` and `frequency` arrays."""
+		L = np.full(distance.shape, MIN_LOSS, dtype = distance.dtype)
+		far = distance > 0.1
+		L[far] = 20*np.log10(distance[far]) + self._reference(frequency, far, 0)
+		
 		return L
+	
+	def _scalar_mean_loss(self, distance, frequency):
+		"""Calculate the free-space loss of a single link."""
+		if distance > 0.1:
+			return 20*np.log10(distance) + self._constants(frequency)[0]
+		return float(MIN_LOSS)
+
+	def max_distance(self, loss, frequency):
+		"""Calculate the largest distance at which the path loss does not exceed `loss`."""
+		if loss < MIN_LOSS:
+			return 0.0
+		return max(0.1, self._friis_distance(loss, frequency))
 
 
 class LogDistance(BasePropagationModel):
 	"""Class for Log-nomal propagation models."""
 
-	def __init__(self, d0 = 1.0, sigma = 0.0, n0 = 2.0):
+	__slots__ = ("d0", "sigma", "n0")
+
+	parameters = ("d0", "n0")
+
+	def __init__(self, d0 = 1.0, sigma = 0.0, n0 = 2.0, rng = None):
 		self.d0 = d0
 		self.sigma = sigma
 		self.n0 = n0
-		super(LogDistance).__init__()
+		super(LogDistance, self).__init__(rng)
 		
 	def loss(self, distance, frequency):
 		"""
@@ -121,33 +391,70 @@ class LogDistance(BasePropagationModel):
 				
 		Parameters
 		----------
-		distance : double
+		distance : double or array_like
 		   The distance between two nodes (m).
 		
-		frequency: double
+		frequency: double or array_like
 			The frequency of operation (Hz).  
 		
 		Returns
 		-------
-		double
-			The loss evaluated for `distance` and `frequency`.
+		double or ndarray
+			The loss evaluated for `distance` and `frequency`. An array is returned when any of the inputs is an array.
 		"""
-		if distance < self.d0:
-			L = self._friis_loss(distance, frequency) + np.random.normal(0, self.sigma)
-		else:
-			L = self._friis_loss(self.d0, frequency) + self.n0*10*math.log10(distance/self.d0) + np.random.normal(0, self.sigma)
+		if self._scalar(distance, frequency):
+			return self._scalar_loss(distance, frequency)
+		distance, frequency = self._broadcast(distance, frequency)
+		
+		L = self._mean_loss(distance, frequency)
+		L += self.shadowing(distance.shape)
+		
+		return L[()]
+	
+	def _mean_loss(self, distance, frequency):
+		"""Calculate the log-distance loss without shadowing for broadcasted `distance` and `frequency` arrays."""
+		L = np.empty(distance.shape, dtype = distance.dtype)
+		near = distance < self.d0
+		far = ~near
+		#the loss below the reference distance does not fall under MIN_LOSS
+		L[near] = np.maximum(20*self._log10(distance[near]) + self._reference(frequency, near, 0), MIN_LOSS)
+		L[far] = self._reference(frequency, far, 1) + self.n0*10*np.log10(distance[far]/self.d0)
+		
 		return L
+	
+	def _scalar_mean_loss(self, distance, frequency):
+		"""Calculate the log-distance loss without shadowing of a single link."""
+		K, PL0 = self._constants(frequency)
+		if distance < self.d0:
+			return float(max(20*np.log10(max(distance, sys.float_info.min)) + K, MIN_LOSS))
+		return PL0 + self.n0*10*np.log10(distance/self.d0)
+
+	def _reference_loss(self, frequency):
+		"""Calculate the Friss term `K` and the reference loss PL0 at `d0`."""
+		K, = super(LogDistance, self)._reference_loss(frequency)
+		return K, 20*math.log10(self.d0) + K
+	
+	def max_distance(self, loss, frequency):
+		"""Calculate the largest distance at which the deterministic part of the path loss does not exceed `loss`."""
+		PL0 = self._constants(frequency)[1]
+		if loss < PL0:
+			return self._friis_distance(loss, frequency)
+		return self.d0*10**((loss - PL0)/(10*self.n0))
 
 class TwoSlope(BasePropagationModel):
 	"""Class for Log-nomal propagation models."""
 
-	def __init__(self, d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0):
+	__slots__ = ("d0", "d1", "sigma", "n0", "n1")
+
+	parameters = ("d0", "d1", "n0", "n1")
+
+	def __init__(self, d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0, rng = None):
 		self.d0 = d0
 		self.d1 = d1
 		self.sigma = sigma
 		self.n0 = n0
 		self.n1 = n1
-		super(TwoSlope).__init__()
+		super(TwoSlope, self).__init__(rng)
 		
 	def loss(self, distance, frequency):
 		"""
@@ -174,22 +481,59 @@ class TwoSlope(BasePropagationModel):
 				
 		Parameters
 		----------
-		distance : double
+		distance : double or array_like
 		   The distance between two nodes (m).
 		
-		frequency: double
+		frequency: double or array_like
 			The frequency of operation (Hz).  
 		
 		Returns
 		-------
-		double
-			The loss evaluated for `distance` and `frequency`.
+		double or ndarray
+			The loss evaluated for `distance` and `frequency`. An array is returned when any of the inputs is an array.
 		"""
-		if distance < self.d0:
-			L = self._friis_loss(distance, frequency) + np.random.normal(0, self.sigma)
-		elif self.d0 <= distance < self.d1:
-			L = self._friis_loss(self.d0, frequency) + self.n0*10*math.log10(distance/self.d0) + np.random.normal(0, self.sigma)
-		else:
-			L = self._friis_loss(self.d0, frequency) + self.n0*10*math.log10(self.d1/self.d0) + self.n1*10*math.log10(distance/self.d1) + np.random.normal(0, self.sigma)
+		if self._scalar(distance, frequency):
+			return self._scalar_loss(distance, frequency)
+		distance, frequency = self._broadcast(distance, frequency)
+		
+		L = self._mean_loss(distance, frequency)
+		L += self.shadowing(distance.shape)
 			
+		return L[()]
+	
+	def _mean_loss(self, distance, frequency):
+		"""Calculate the two-slope loss without shadowing for broadcasted `distance` and `frequency` arrays."""
+		L = np.empty(distance.shape, dtype = distance.dtype)
+		near = distance < self.d0
+		middle = (self.d0 <= distance) & (distance < self.d1)
+		far = ~(near | middle)
+		#the loss below the reference distance does not fall under MIN_LOSS
+		L[near] = np.maximum(20*self._log10(distance[near]) + self._reference(frequency, near, 0), MIN_LOSS)
+		L[middle] = self._reference(frequency, middle, 1) + self.n0*10*np.log10(distance[middle]/self.d0)
+		L[far] = self._reference(frequency, far, 2) + self.n1*10*np.log10(distance[far]/self.d1)
+		
 		return L
+	
+	def _scalar_mean_loss(self, distance, frequency):
+		"""Calculate the two-slope loss without shadowing of a single link."""
+		K, PL0, PL1 = self._constants(frequency)
+		if distance < self.d0:
+			return float(max(20*np.log10(max(distance, sys.float_info.min)) + K, MIN_LOSS))
+		if distance < self.d1:
+			return PL0 + self.n0*10*np.log10(distance/self.d0)
+		return PL1 + self.n1*10*np.log10(distance/self.d1)
+
+	def _reference_loss(self, frequency):
+		"""Calculate the Friss term `K` and the reference losses PL0 at `d0` and PL1 at `d1`."""
+		K, = super(TwoSlope, self)._reference_loss(frequency)
+		PL0 = 20*math.log10(self.d0) + K
+		return K, PL0, PL0 + self.n0*10*math.log10(self.d1/self.d0)
+	
+	def max_distance(self, loss, frequency):
+		"""Calculate the largest distance at which the deterministic part of the path loss does not exceed `loss`."""
+		K, PL0, PL1 = self._constants(frequency)
+		if loss < PL0:
+			return self._friis_distance(loss, frequency)
+		if loss < PL1:
+			return self.d0*10**((loss - PL0)/(10*self.n0))
+		return self.d1*10**((loss - PL1)/(10*self.n1))
@@ -0,0 +1,38 @@
+# Author: Edielson P. Frigieri <edielsonpf@gmail.com>
+#
+# License: MIT
+
+import numpy as np
+
+from wsntk.models import ExponentialConsumption, NoConsumption
+
+
+def test_exponential_decay_matches_steps():
+	# Test that the decay of several steps is the product of the consumption of each step.
+	
+	model = ExponentialConsumption(scaling = 20.0)
+	tx_power = np.array([0.0, 10.0, 20.0])
+	
+	assert np.allclose(model.decay(tx_power, 7), model.consumption(tx_power)**7, rtol = 1e-12)
+	assert np.array_equal(model.decay(tx_power, 0), np.ones(3))
+
+def test_steps_to_threshold():
+	# Test that the number of steps to the threshold matches the residual decayed step by step.
+	
+	model = ExponentialConsumption(scaling = 20.0)
+	residual = np.array([100.0, 50.0, 0.05, 100.0])
+	tx_power = np.array([10.0, 15.0, 10.0, 20.0])
+	steps = model.steps_to_threshold(residual, tx_power, 0.1)
+	
+	assert steps[2] == 0
+	for sensor in (0, 1, 3):
+		assert residual[sensor]*model.decay(tx_power[sensor], steps[sensor]) <= 0.1
+		assert residual[sensor]*model.decay(tx_power[sensor], steps[sensor] - 1) > 0.1
+
+def test_no_consumption_never_reaches_threshold():
+	# Test that the energy of sensors without consumption never runs out.
+	
+	model = NoConsumption()
+	
+	assert model.steps_to_threshold(100.0, 10.0, 0.1) == np.inf
+	assert model.decay(10.0, 1000) == 1
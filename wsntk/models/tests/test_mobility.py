@@ -0,0 +1,65 @@
+# Author: Edielson P. Frigieri <edielsonpf@gmail.com>
+#
+# License: MIT
+
+import pytest
+import numpy as np
+
+from wsntk.models import NoMobility, RandomWalk, RandomWaypoint, GaussMarkov
+
+DIMENSIONS = np.array([100.0, 50.0])
+
+@pytest.mark.parametrize("model", [RandomWalk(5.0), RandomWaypoint(5.0), GaussMarkov(5.0), RandomWalk(30.0, boundary = "wrap"), GaussMarkov(30.0, alpha = 0.9, boundary = "wrap")])
+def test_sensors_stay_in_the_area(model):
+	# Test that the sensors never leave the area.
+	
+	model.rng = np.random.default_rng(0)
+	positions = model.rng.random((3, 20, 2))*DIMENSIONS
+	for _ in range(200):
+		moved = model.move(positions, DIMENSIONS)
+		assert moved is positions
+		assert np.all((positions >= 0) & (positions <= DIMENSIONS))
+
+def test_random_walk_step_length():
+	# Test that a random walk covers `speed` meters per step away from the borders.
+	
+	model = RandomWalk(2.0, rng = np.random.default_rng(1))
+	positions = np.full((50, 2), 25.0)
+	start = positions.copy()
+	model.move(positions, DIMENSIONS)
+	
+	assert np.allclose(np.sqrt(np.sum((positions - start)**2, axis = -1)), 2.0)
+
+def test_reflection_and_wrap():
+	# Test that the borders reflect or wrap the sensors.
+	
+	model = RandomWalk()
+	positions = np.array([[105.0, -10.0], [-250.0, 60.0]])
+	model._bound(positions, DIMENSIONS)
+	assert np.allclose(positions, [[95.0, 10.0], [50.0, 40.0]])
+	
+	model = RandomWalk(boundary = "wrap")
+	positions = np.array([[105.0, -10.0], [-250.0, 60.0]])
+	model._bound(positions, DIMENSIONS)
+	assert np.allclose(positions, [[5.0, 40.0], [50.0, 10.0]])
+
+def test_random_waypoint_reaches_waypoints():
+	# Test that the sensors move in straight lines and stop at their waypoints.
+	
+	model = RandomWaypoint(10.0, rng = np.random.default_rng(2))
+	positions = np.zeros((10, 2))
+	model.move(positions, DIMENSIONS)
+	waypoints = model.waypoints.copy()
+	
+	for _ in range(12):
+		model.move(positions, DIMENSIONS)
+	assert not np.any(np.all(model.waypoints == waypoints, axis = -1))
+
+def test_static_and_unknown_models():
+	# Test the static model and the rejection of unknown boundaries.
+	
+	positions = np.ones((4, 2))
+	assert np.array_equal(NoMobility().move(positions, DIMENSIONS), np.ones((4, 2)))
+	
+	with pytest.raises(ValueError, match='The boundary torus is not supported. '):
+		RandomWalk(boundary = "torus")
@@ -75,4 +75,131 @@ def test_two_slope_diffent_d0_and_d1():
 	
 	#the change in the slope only happens after 15 meters
 	loss = link.loss(distance = 15, frequency = 2.4e9)
-	assert round(loss,2) ==  63.57				
\ No newline at end of file
+	assert round(loss,2) ==  63.57				
+
+
+def test_free_space_array():
+	# Test FreeSpace loss evaluated over an array of distances.
+
+	link = FreeSpace()
+
+	distance = np.array([0.05, 2.0, 10.0])
+	loss = link.loss(distance = distance, frequency = 933e6)
+	
+	assert loss.shape == (3,)
+	assert loss[0] == 0
+	assert round(loss[1],2) == 37.87
+	
+	
+def test_log_distance_array_matches_scalar():
+	# Test LogDistance array evaluation against the scalar path with the same seed.
+
+	link = LogDistance(d0 = 1.0, sigma = 8.7, n0 = 2.2)
+	distance = np.array([0.5, 1.0, 2.0, 15.0, 300.0])
+	frequency = np.array([933e6, 933e6, 2.4e9, 2.4e9, 933e6])
+
+	np.random.seed(0xffff)
+	expected = [link.loss(d, f) for d, f in zip(distance, frequency)]
+	
+	np.random.seed(0xffff)
+	loss = link.loss(distance, frequency)
+	
+	assert np.array_equal(loss, expected)
+		
+		
+def test_two_slope_array_matches_scalar():
+	# Test TwoSlope array evaluation against the scalar path covering the three distance fields.
+
+	link = TwoSlope(d0 = 1.0, d1 = 10.0, sigma = 5.2, n0 = 2.2, n1 = 3.3)
+	distance = np.array([[0.5, 1.0, 2.0], [10.0, 15.0, 300.0]])
+
+	np.random.seed(0xffff)
+	expected = [[link.loss(d, 2.4e9) for d in row] for row in distance]
+	
+	np.random.seed(0xffff)
+	loss = link.loss(distance, 2.4e9)
+	
+	assert loss.shape == (2, 3)
+	assert np.array_equal(loss, expected)
+	
+	
+def test_max_distance_inverts_loss():
+	# Test that the maximum distance of a loss is the distance that produced it.
+
+	for link in (FreeSpace(), LogDistance(d0 = 1.0, n0 = 2.2), TwoSlope(d0 = 1.0, d1 = 10.0, n0 = 2.2, n1 = 3.3)):
+		for distance in (0.5, 4.0, 40.0, 700.0):
+			loss = link.loss(distance, 933e6)
+			assert round(link.max_distance(loss, 933e6), 6) == distance
+	
+	
+def test_log_distance_with_generator():
+	# Test that shadowing is drawn from the generator of the model.
+
+	link = LogDistance(d0 = 1.0, sigma = 8.7, n0 = 2.0, rng = np.random.default_rng(0xffff))
+	loss = link.loss(np.array([2.0, 20.0]), 933e6)
+	
+	noise = np.random.default_rng(0xffff).normal(0, 8.7, 2)
+	assert np.allclose(loss - noise, LogDistance(d0 = 1.0, n0 = 2.0).mean_loss(np.array([2.0, 20.0]), 933e6))
+	
+	
+def test_reference_losses_are_cached_per_frequency():
+	# Test the bounded cache of reference losses with heterogeneous radios.
+
+	link = TwoSlope(d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.2, n1 = 3.3)
+	link.cache_size = 2
+	
+	distance = np.array([2.0, 15.0, 2.0, 15.0])
+	frequency = np.array([2.4e9, 2.4e9, 933e6, 933e6])
+	loss = link.loss(distance, frequency)
+	
+	assert np.round(loss[:2], 2).tolist() == [46.67, 67.86]
+	assert sorted(link._cache) == [933e6, 2.4e9]
+	
+	#the least recently used frequency is evicted
+	link.loss(2.0, 2.4e9)
+	link.loss(2.0, 5e9)
+	assert list(link._cache) == [2.4e9, 5e9]
+
+
+@pytest.mark.parametrize("model", [FreeSpace(), LogDistance(d0 = 1.0, n0 = 2.2), TwoSlope(d0 = 1.0, d1 = 10.0, n0 = 2.2, n1 = 3.3)])
+def test_single_precision_losses_match_double_precision(model):
+	# Test that single precision distances give single precision losses, finite for coincident sensors.
+	
+	distance = np.array([0.0, 1e-30, 1e-3, 0.5, 2.0, 15.0, 1500.0])
+	with np.errstate(all = "raise"):
+		loss = model.mean_loss(distance.astype(np.float32), 2.4e9)
+		expected = model.mean_loss(distance, 2.4e9)
+	
+	assert loss.dtype == np.float32 and expected.dtype == np.float64
+	assert np.all(np.isfinite(loss)) and np.all(loss >= models.propagation.MIN_LOSS)
+	assert np.allclose(loss, expected, rtol = 0, atol = 1e-4)
+
+
+@pytest.mark.parametrize("model, parameter, value", [
+	(LogDistance(d0 = 1.0, n0 = 2.0), "d0", 10.0),
+	(LogDistance(d0 = 1.0, n0 = 2.0), "n0", 3.0),
+	(TwoSlope(d0 = 1.0, d1 = 10.0, n0 = 2.0, n1 = 3.0), "n0", 2.5),
+	(TwoSlope(d0 = 1.0, d1 = 10.0, n0 = 2.0, n1 = 3.0), "d1", 20.0),
+])
+def test_reference_losses_follow_model_parameters(model, parameter, value):
+	# Test that changing a parameter of a model after a loss calculation clears its cached reference losses.
+
+	model.loss(50, 2.4e9)
+	setattr(model, parameter, value)
+	
+	expected = type(model)(**{name: getattr(model, name) for name in model.parameters})
+	assert model.loss(50, 2.4e9) == expected.loss(50, 2.4e9)
+
+
+@pytest.mark.parametrize("model_class, params", [(FreeSpace, {}), (LogDistance, {"d0": 2.0, "sigma": 4.0, "n0": 2.2}), (TwoSlope, {"d0": 2.0, "d1": 10.0, "sigma": 4.0, "n0": 2.2, "n1": 3.3})])
+def test_scalar_losses_match_array_losses(model_class, params):
+	# Test that a single link given as scalars draws the same shadowing and gets the same loss as an array of links.
+	
+	distance = [0.0, 0.05, 1.0, 2.0, 5.0, 15.0, 1500.0]
+	scalar = model_class(rng = np.random.default_rng(7), **params)
+	vector = model_class(rng = np.random.default_rng(7), **params)
+	
+	losses = [scalar.loss(value, 2.4e9) for value in distance]
+	assert all(np.ndim(loss) == 0 for loss in losses)
+	assert np.array_equal(losses, vector.loss(np.array(distance), 2.4e9))
+	assert np.array_equal([scalar.mean_loss(value, 2.4e9) for value in distance], vector.mean_loss(np.array(distance), 2.4e9))
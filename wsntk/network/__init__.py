@@ -1,5 +1,10 @@
-from ._link import RadioLink
-from ._sensor import SensorNode, RADIO_CONFIG
+from ._state import SensorState
+from ._index import GridIndex
+from ._connectivity import Connectivity
+from ._routing import Router
+from ._instrument import Instrumentation
+from ._link import RadioLink, RadioLinkMatrix, RadioLinkSparse, LinkTable
+from ._sensor import SensorNode, RADIO_CONFIG, register_radio
 from ._network import SensorNetwork
 
-__all__ = ['SensorNode', 'SensorNetwork', 'RADIO_CONFIG', 'RadioLink']
\ No newline at end of file
+__all__ = ['SensorNode', 'SensorNetwork', 'RADIO_CONFIG', 'register_radio', 'RadioLink', 'RadioLinkMatrix', 'RadioLinkSparse', 'LinkTable', 'SensorState', 'GridIndex', 'Connectivity', 'Router', 'Instrumentation']
\ No newline at end of file
@@ -0,0 +1,74 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""Checkpoints of the state of sensor network simulations."""
+
+import json
+import numpy as np
+
+#version of the layout of the checkpoint files
+CHECKPOINT_VERSION = 1
+
+def _encode(obj):
+	"""Encode the arrays of a random generator state as JSON."""
+	if isinstance(obj, np.ndarray):
+		return {"__array__": obj.tolist(), "dtype": obj.dtype.str}
+	if isinstance(obj, np.generic):
+		return obj.item()
+	raise TypeError("Object of type %s is not JSON serializable" % type(obj).__name__)
+
+def _decode(obj):
+	"""Decode the arrays of a random generator state from JSON."""
+	if "__array__" in obj:
+		return np.array(obj["__array__"], dtype = obj["dtype"])
+	return obj
+
+def _rng_state(rng):
+	"""
+	Get the state of a random generator
+
+	Parameters
+	----------
+	rng : {numpy.random.Generator or the numpy.random module}
+		The generator, the global numpy generator when it is the ``numpy.random`` module
+
+	Returns
+	-------
+	dict
+		The state of the bit generator, which restores the sequence of draws
+	"""
+	if rng is np.random:
+		return np.random.get_state(legacy = False)
+	return rng.bit_generator.state
+
+def _set_rng_state(rng, state):
+	"""
+	Restore the state of a random generator
+
+	Parameters
+	----------
+	rng : {numpy.random.Generator or the numpy.random module}
+		The generator, the global numpy generator when it is the ``numpy.random`` module
+
+	state : {dict}
+		The state returned by ``_rng_state``
+
+	Returns
+	-------
+	No data returned
+	"""
+	if rng is np.random:
+		np.random.set_state(state)
+	else:
+		rng.bit_generator.state = state
+
+def _dump_meta(meta):
+	"""Encode the metadata of a checkpoint, including random generator states, as a string array."""
+	return np.array(json.dumps(meta, default = _encode))
+
+def _load_meta(array):
+	"""Decode the metadata of a checkpoint from its string array."""
+	return json.loads(str(array), object_hook = _decode)
@@ -0,0 +1,127 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""Connectivity metrics of sensor networks."""
+
+import numpy as np
+
+def _union(labels, u, v):
+	"""
+	Merge the components joined by a list of edges.
+
+	This is a vectorized union-find: the roots of the endpoints of all edges are hooked at once to the
+	smallest root, and the paths are then compressed by pointer jumping, until no edge joins two components.
+
+	Parameters
+	----------
+	labels : ndarray
+	   The component of each sensor, the smallest sensor of the component. Updated in place.
+
+	u, v: ndarray
+		The endpoints of the edges.
+
+	Returns
+	-------
+	ndarray
+		The updated `labels`.
+	"""
+	while True:
+		root_u, root_v = labels[u], labels[v]
+		joined = root_u != root_v
+		if not np.any(joined):
+			return labels
+
+		root_u, root_v = root_u[joined], root_v[joined]
+		root = np.minimum(root_u, root_v)
+		np.minimum.at(labels, root_u, root)
+		np.minimum.at(labels, root_v, root)
+		while True:
+			parent = labels[labels]
+			if np.array_equal(parent, labels):
+				break
+			labels[:] = parent
+
+class Connectivity(object):
+	"""
+	Connectivity metrics class.
+	This class maintains the connected components and the degree of the sensors of a network from the
+	status of its links. Two sensors are neighbors when a link is up in either direction. New links only
+	merge components, so the components are updated from the links that came up, and recalculated from
+	all links only when a link went down.
+
+	Required arguments:
+
+		*nr_sensors*:
+			Integer, the number of sensors.
+	"""
+
+	def __init__(self, nr_sensors):
+
+		self.nr_sensors = nr_sensors
+		self.labels = np.arange(nr_sensors)
+		self.degree = np.zeros(nr_sensors, dtype = int)
+		self.edges = np.empty(0, dtype = np.int64)
+		self.recomputes = 0
+
+	def _edges(self, status):
+		"""Get the sorted keys of the undirected links that are up."""
+		if isinstance(status, tuple):
+			#the sparse engine returns the status as (data, (rx, tx))
+			data, (rx, tx) = status
+			up = np.asarray(data, dtype = bool)
+			rx, tx = np.asarray(rx)[up], np.asarray(tx)[up]
+		else:
+			rx, tx = np.nonzero(np.asarray(status))
+		return np.unique(np.minimum(rx, tx).astype(np.int64)*self.nr_sensors + np.maximum(rx, tx))
+
+	def update(self, status, activities):
+		"""
+		Update the metrics with the status of the links
+
+		Parameters
+		----------
+		status : {array_like or tuple}
+			Status of the links, a dense (N, N) matrix or a sparse (data, (rx, tx)) triplet
+
+		activities : {array_like}
+			Activity status of each sensor: 0 -> inactive, 1 -> active
+
+		Returns
+		-------
+		dict
+			"labels": the component of each sensor, identified by its smallest sensor,
+			"components": the number of components with active sensors,
+			"degree": the number of neighbors of each sensor,
+			"isolated": the active sensors without neighbors,
+			"partitioned": True if the active sensors are split in more than one component
+		"""
+		edges = self._edges(status)
+		added = np.setdiff1d(edges, self.edges, assume_unique = True)
+		removed = np.setdiff1d(self.edges, edges, assume_unique = True)
+		self.edges = edges
+
+		for keys, sign in ((added, 1), (removed, -1)):
+			self.degree += sign*np.bincount(np.concatenate(np.divmod(keys, self.nr_sensors)), minlength = self.nr_sensors)
+
+		if len(removed):
+			#a link that goes down may split a component
+			self.labels = np.arange(self.nr_sensors)
+			keys = edges
+			self.recomputes += 1
+		else:
+			keys = added
+		if len(keys):
+			_union(self.labels, *np.divmod(keys, self.nr_sensors))
+
+		active = np.asarray(activities, dtype = bool)
+		components = len(np.unique(self.labels[active]))
+		return {
+			"labels": self.labels.copy(),
+			"components": components,
+			"degree": self.degree.copy(),
+			"isolated": active & (self.degree == 0),
+			"partitioned": components > 1,
+		}
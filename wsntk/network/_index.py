@@ -0,0 +1,110 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""Spatial index for neighbor queries among sensor nodes."""
+
+import itertools
+import numpy as np
+
+class GridIndex(object):
+	"""
+	Uniform grid spatial index.
+	The space is split in cubic cells with side equal to the query radius, so the neighbors of a sensor
+	are always in its own cell or in one of the adjacent cells.
+	The index is only rebuilt when the positions change.
+
+	Required arguments:
+
+		*radius*:
+			Double, the maximum distance between two neighbors.
+	"""
+
+	def __init__(self, radius):
+
+		self.radius = radius
+		self.positions = None
+		self.rx = np.empty(0, dtype = np.intp)
+		self.tx = np.empty(0, dtype = np.intp)
+		self.distance = np.empty(0)
+
+	def update(self, positions):
+		"""
+		Update the index for new sensor positions
+
+		Parameters
+		----------
+		positions : {ndarray}
+			Array (N, ndim) with the position of each sensor
+
+		Returns
+		-------
+		boolean
+			True if the neighbor pairs were rebuilt, False if the positions did not change
+		"""
+		if self.positions is not None and np.array_equal(self.positions, positions):
+			return False
+
+		#single precision positions give single precision distances
+		positions = np.asarray(positions)
+		self.positions = np.array(positions, dtype = np.float32 if positions.dtype == np.float32 else float)
+		self.rx, self.tx, self.distance = self._query_pairs(self.positions)
+		return True
+
+	def pairs(self):
+		"""
+		Get the neighbor pairs
+
+		Parameters
+		----------
+		No parameters
+
+		Returns
+		-------
+		tuple of ndarray
+			The receiver and transmitter indexes of all ordered pairs of distinct sensors within `radius`,
+			sorted in row-major order, and their distances
+		"""
+		return self.rx, self.tx, self.distance
+
+	def _query_pairs(self, positions):
+		"""Find all ordered pairs of distinct positions within `radius` of each other."""
+		nr_sensors, ndim = positions.shape
+		if nr_sensors == 0 or not self.radius > 0:
+			return np.empty(0, dtype = np.intp), np.empty(0, dtype = np.intp), np.empty(0, dtype = positions.dtype)
+
+		#integer cell coordinates, shifted by one so the adjacent cells are never negative
+		cells = np.floor(positions / self.radius).astype(np.int64)
+		cells -= cells.min(axis = 0) - 1
+		strides = np.cumprod(np.r_[1, cells.max(axis = 0)[:-1] + 2])
+		keys = cells @ strides
+
+		order = np.argsort(keys, kind = "stable")
+		sorted_keys = keys[order]
+
+		list_rx = []
+		list_tx = []
+		for offset in itertools.product((-1, 0, 1), repeat = ndim):
+			#range of sensors, in sorted order, that lie in the adjacent cell
+			neighbor = keys + np.dot(offset, strides)
+			start = np.searchsorted(sorted_keys, neighbor, side = "left")
+			counts = np.searchsorted(sorted_keys, neighbor, side = "right") - start
+
+			rx = np.repeat(np.arange(nr_sensors), counts)
+			first = np.repeat(start - (np.cumsum(counts) - counts), counts)
+			tx = order[first + np.arange(len(rx))]
+			list_rx.append(rx)
+			list_tx.append(tx)
+
+		rx = np.concatenate(list_rx)
+		tx = np.concatenate(list_tx)
+		distance = np.sqrt(np.sum((positions[rx] - positions[tx])**2, axis = -1))
+
+		#a small tolerance keeps the pairs exactly at the radius
+		neighbors = (rx != tx) & (distance <= self.radius*(1 + 1e-9))
+		rx, tx, distance = rx[neighbors], tx[neighbors], distance[neighbors]
+
+		order = np.lexsort((tx, rx))
+		return rx[order], tx[order], distance[order]
@@ -0,0 +1,167 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""Instrumentation of sensor network simulations."""
+
+from collections import defaultdict
+from contextlib import contextmanager
+import sys
+import time
+import numpy as np
+
+def _sizeof(obj):
+	"""Get the bytes of an object and of its attributes dictionary, which objects with ``__slots__`` do not have."""
+	size = sys.getsizeof(obj)
+	if hasattr(obj, "__dict__"):
+		size += sys.getsizeof(vars(obj))
+	return size
+
+class _Untimed(object):
+	"""Context manager standing for the phases of networks without instrumentation, which are not timed."""
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		return False
+
+UNTIMED = _Untimed()
+
+class _CountingGenerator(object):
+	"""Random generator proxy that counts the numbers drawn and the time spent drawing them."""
+
+	draws = ("normal", "random")
+
+	def __init__(self, rng, instrumentation):
+		self.rng = rng
+		self.instrumentation = instrumentation
+
+	def __getattr__(self, name):
+		method = getattr(self.rng, name)
+		if name not in self.draws:
+			return method
+
+		instrumentation = self.instrumentation
+		def draw(*args, **kwargs):
+			start = time.perf_counter()
+			values = method(*args, **kwargs)
+			instrumentation.timers["rng"] += time.perf_counter() - start
+			instrumentation.counters["rng_draws"] += np.size(values)
+			return values
+		return draw
+
+class Instrumentation(object):
+	"""
+	Instrumentation class.
+	This class collects the wall-clock time of each phase of the steps of a network, the number of links
+	evaluated and skipped and the number of random numbers drawn. After each step, the listeners are called
+	with the step number and the timers and counters of the step.
+
+	The phases are "sensors", the update of the sensors, "links", the update of the links, and "output",
+	the conversion of the outputs. The "rng" timer is the time spent drawing random numbers, which is
+	also part of the time of the phase that draws them.
+
+	Optional arguments:
+
+		*listeners*:
+			Callables, called as ``listener(step, timers, counters)`` after each step.
+	"""
+
+	def __init__(self, *listeners):
+
+		self.listeners = list(listeners)
+		self.steps = 0
+		self.timers = defaultdict(float)
+		self.counters = defaultdict(int)
+		self.totals = {"timers": defaultdict(float), "counters": defaultdict(int)}
+		self.memory = {}
+
+	def add_listener(self, listener):
+		"""
+		Add a listener called after each step
+
+		Parameters
+		----------
+		listener : {callable}
+			Called as ``listener(step, timers, counters)``
+
+		Returns
+		-------
+		No data returned
+		"""
+		self.listeners.append(listener)
+
+	@contextmanager
+	def phase(self, name):
+		"""Time a phase of the current step."""
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.timers[name] += time.perf_counter() - start
+
+	def count(self, name, value):
+		"""Add `value` to a counter of the current step."""
+		self.counters[name] += value
+
+	def end_step(self):
+		"""Accumulate the current step and notify the listeners."""
+		self.steps += 1
+		timers, counters = dict(self.timers), dict(self.counters)
+		for name, value in timers.items():
+			self.totals["timers"][name] += value
+		for name, value in counters.items():
+			self.totals["counters"][name] += value
+		self.timers.clear()
+		self.counters.clear()
+
+		for listener in self.listeners:
+			listener(self.steps, timers, counters)
+
+	def summary(self):
+		"""
+		Summarize the instrumented steps
+
+		Parameters
+		----------
+		No parameters
+
+		Returns
+		-------
+		dict
+			The number of steps, the total and mean per step of each timer [s] and counter, and the
+			bytes held by the state of the sensors and of the links after the last step
+		"""
+		steps = max(self.steps, 1)
+		return {
+			"steps": self.steps,
+			"timers": {name: {"total": value, "mean": value/steps} for name, value in self.totals["timers"].items()},
+			"counters": {name: {"total": value, "mean": value/steps} for name, value in self.totals["counters"].items()},
+			"memory": dict(self.memory),
+		}
+
+	def report(self):
+		"""
+		Format the summary as a text report
+
+		Parameters
+		----------
+		No parameters
+
+		Returns
+		-------
+		string
+			One line per timer, counter and memory gauge
+		"""
+		summary = self.summary()
+		lines = ["%d steps" % summary["steps"]]
+		for name, value in summary["timers"].items():
+			lines.append("%-16s %12.6f s total %12.6f s/step" % (name, value["total"], value["mean"]))
+		for name, value in summary["counters"].items():
+			lines.append("%-16s %12d total %12.1f /step" % (name, value["total"], value["mean"]))
+		for name, value in summary["memory"].items():
+			lines.append("%-16s %12d bytes" % (name, value))
+		return "\n".join(lines)
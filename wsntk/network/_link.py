@@ -10,33 +10,40 @@ from abc import ABCMeta, abstractmethod
 import numpy as np
 import math
 
+#number of links evaluated at once by the link matrix when drawing shadowing
+BLOCK_LINKS = 1 << 18
+
 class BaseLink(metaclass=ABCMeta):
 	"""Base class for radio links."""
     
+	__slots__ = ("tx_power", "rx_sensitivity", "distance", "frequency", "model")
+	
 	propagation_models = {
 		"FSPL": (FreeSpace,),
 		"LDPL": (LogDistance,),
 		"TSPL": (TwoSlope,),
 	}
 	
-	def __init__(self, tx_power, rx_sensitivity, distance, frequency, loss = "LDPL", d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0):
+	def __init__(self, tx_power, rx_sensitivity, distance, frequency, loss = "LDPL", d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0, rng = None, model = None):
         
 		self.tx_power = tx_power
 		self.rx_sensitivity = rx_sensitivity
 		self.distance = distance
 		self.frequency = frequency	
-		self.model = self._init_link(loss, d0, d1, sigma, n0, n1)
+		#links given a propagation model share it instead of creating their own
+		self.model = self._init_link(loss, d0, d1, sigma, n0, n1, rng) if model is None else model
 		
-	def _init_link(self, loss, d0, d1, sigma, n0, n1):
-		"""Get ``Propagation Class`` object for str ``loss``. """
+	@classmethod
+	def _init_link(cls, loss, d0, d1, sigma, n0, n1, rng = None):
+		"""Get ``Propagation Class`` object for str ``loss``, drawing shadowing from `rng`. """
 		try:
-			model_ = self.propagation_models[loss]
+			model_ = cls.propagation_models[loss]
 			model_class, args = model_[0], model_[1:]
 			if loss in ('LDPL'):
 				args = (d0, sigma, n0)
 			if loss in ('TSPL'):
 				args = (d0, d1, sigma, n0, n1)	
-			return model_class(*args)
+			return model_class(*args, rng = rng)
 		except KeyError as e:
 
 			raise ValueError("The propagation loss %s is not supported. " % loss) from e
@@ -115,17 +122,32 @@ class BaseLink(metaclass=ABCMeta):
 		
 
 class RadioLink(BaseLink):
-	"""Class for radio links."""
+	"""
+	Class for radio links.
+	
+	The loss without shadowing is cached and only recalculated when the distance or the frequency 
+	of the link or the parameters of its model change, the shadowing is drawn again on every update.
+	"""
 
-	def __init__(self, tx_power, rx_sensitivity, distance, frequency, loss = "LDPL", d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0):
+	__slots__ = ("_mean", "_key")
 
-		super(RadioLink, self).__init__(tx_power, rx_sensitivity, distance, frequency, loss, d0, d1, sigma, n0, n1)
+	def __init__(self, tx_power, rx_sensitivity, distance, frequency, loss = "LDPL", d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0, rng = None, model = None):
+
+		super(RadioLink, self).__init__(tx_power, rx_sensitivity, distance, frequency, loss, d0, d1, sigma, n0, n1, rng, model)
+		self._mean = None
+		self._key = None
 	
 	def _update_link(self):
 		"""Update the links status based on the current parameters."""
-		 
+		
+		#the loss without shadowing only depends on the distance, the frequency and the model parameters
+		key = (self.distance, self.frequency, self.model.version)
+		if key != self._key:
+			self._mean = self.model.mean_loss(self.distance, self.frequency)
+			self._key = key
+		
 		#calculate the path loss
-		loss = self.model.loss(self.distance, self.frequency)
+		loss = self._mean if self.model.deterministic else self._mean + self.model.shadowing(None)
 		#calculated the received power
 		rx_power = self.tx_power - loss
 		#define the currentlink status	
@@ -137,7 +159,445 @@ class RadioLink(BaseLink):
 		return loss, link_status
 
 
+class RadioLinkMatrix(BaseLink):
+	"""
+	Class for the radio links among every pair of sensors of a network.
+	
+	The link parameters are arrays instead of scalars, and the whole set of links is evaluated at once. 
+	Rows are indexed by the receiver and columns by the transmitter, as in the lists produced by ``SensorNetwork``.
+	
+	The loss without shadowing and, for models without shadowing, the loss and status of every link 
+	are cached. Only the rows and columns of sensors flagged with ``touch`` or whose activity changed 
+	are recalculated, all of them when the parameters of the model change, while shadowing is drawn again for all links on every update, by blocks of 
+	rows of at most ``BLOCK_LINKS`` links so the temporary arrays do not grow with the whole matrix.
+	The status is stored as booleans.
+	
+	All arrays may carry leading axes, for instance a replica axis (R, N) and (R, N, N), and the links of 
+	every replica are evaluated together.
+	
+	Required arguments:
+	
+		*tx_power*:
+		Array of doubles (..., N), the transmission power of each sensor [dBm].
+		
+		*rx_sensitivity*:
+		Array of doubles (..., N), the receiver sensitivity of each sensor [dBm].
+		
+		*distance*:
+		Array of doubles (..., N, N), the distance between each pair of sensors [m].
+		
+		*frequency*:
+		Array of doubles (..., N), the frequency of operation of each sensor [Hz].
+		
+		*activity*:
+		Array of integers (..., N), the activity status of each sensor: 0 -> inactive, 1 -> active.
+	"""
 
+	__slots__ = ("activity", "evaluated", "_mean", "_loss", "_status", "_alive", "_dirty", "_others", "_version")
 
+	def __init__(self, tx_power, rx_sensitivity, distance, frequency, activity, loss = "LDPL", d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0, rng = None, model = None):
 
+		super(RadioLinkMatrix, self).__init__(tx_power, rx_sensitivity, distance, frequency, loss, d0, d1, sigma, n0, n1, rng, model)
+		self.activity = activity
+		#number of links evaluated by the last update
+		self.evaluated = 0
+		self._reset()
+	
+	def _reset(self):
+		"""Discard the cached links."""
+		shape = np.shape(self.distance)
+		#the losses are stored with the precision of the distances
+		dtype = np.float32 if np.asarray(self.distance).dtype == np.float32 else float
+		self._mean = np.zeros(shape, dtype = dtype)
+		self._loss = np.zeros(shape, dtype = dtype)
+		self._status = np.zeros(shape, dtype = bool)
+		self._alive = np.zeros(shape[:-1], dtype = bool)
+		self._dirty = np.ones(shape[-1], dtype = bool)
+		#there is no link towards itself
+		self._others = ~np.eye(shape[-1], dtype = bool)
+		#version of the model the cached losses were calculated with
+		self._version = self.model.version
+	
+	def touch(self, index = None):
+		"""
+		Flag the links of a set of sensors for update
+		
+		Parameters
+		----------
+		index : {integer, array of integers or boolean mask}
+			The sensors whose links changed, all sensors when omitted
+		
+		Returns
+		-------
+		No data returned
+		"""
+		if index is None:
+			self._dirty[:] = True
+		else:
+			self._dirty[index] = True
+	
+	def set_txpower(self, tx_power):
+		"""Set transmission power of each sensor and flag all links for update."""
+		self.tx_power = tx_power
+		self.touch()
+	
+	def set_rxsensitivity(self, rx_sensitivity):
+		"""Set receiver sensitivity of each sensor and flag all links for update."""
+		self.rx_sensitivity = rx_sensitivity
+		self.touch()
+	
+	def set_distance(self, distance):
+		"""Set the distance between each pair of sensors and flag all links for update."""
+		self.distance = distance
+		if np.shape(distance) != self._mean.shape:
+			self._reset()
+		self.touch()
+	
+	def set_frequency(self, frequency):
+		"""Set frequency of each sensor and flag all links for update."""
+		self.frequency = frequency
+		self.touch()
+	
+	def set_distance_rows(self, index, distance):
+		"""
+		Set the distances from a subset of sensors to all sensors and flag their links for update
+		
+		Parameters
+		----------
+		index : {array of integers}
+			The sensors whose distances changed
+		
+		distance : {array of doubles}
+			Array (..., K, N) with the distance from each sensor in `index` to every sensor
+		
+		Returns
+		-------
+		No data returned
+		"""
+		self.distance[..., index, :] = distance
+		self.distance[..., :, index] = np.swapaxes(distance, -1, -2)
+		self.touch(index)
+	
+	def set_activity(self, activity):
+		"""
+		Set the activity status of the sensors
+		
+		Parameters
+		----------
+		activity : {array of integers}
+			Activity status of each sensor: 0 -> inactive, 1 -> active
+		
+		Returns
+		-------
+		No data returned
+		"""
+		self.activity = activity
+	
+	def _update_mean(self, index):
+		"""Recalculate the loss without shadowing in the rows and columns of the sensors in `index`."""
+		distance = np.asarray(self.distance, dtype = self._mean.dtype)
+		frequency = np.asarray(self.frequency, dtype = float)
+		nr_sensors = distance.shape[-1]
+		
+		#the frequency of the transmitter of each column is broadcast by the model, which keeps a 
+		#frequency shared by all sensors as a single value
+		for rows in self._blocks(len(index)):
+			block = index[rows]
+			self._mean[..., block, :] = self.model.mean_loss(distance[..., block, :], frequency[..., None, :])
+			if len(index) < nr_sensors:
+				self._mean[..., :, block] = self.model.mean_loss(distance[..., :, block], frequency[..., None, block])
+		#there is no link towards itself
+		self._mean[..., index, index] = 0
+	
+	def _blocks(self, count):
+		"""Split `count` sensors into slices of sensors whose rows or columns hold at most ``BLOCK_LINKS`` links."""
+		step = max(1, BLOCK_LINKS//max(self._others.shape[-1], 1))
+		for start in range(0, count, step):
+			yield slice(start, start + step)
+	
+	def _update_status(self, rows, columns, valid):
+		"""Update the loss and status of a block of links without shadowing."""
+		tx_power = np.asarray(self.tx_power, dtype = self._loss.dtype)
+		rx_sensitivity = np.asarray(self.rx_sensitivity, dtype = self._loss.dtype)
+		block = (Ellipsis, rows[:, None], columns[None, :])
+		
+		loss = np.where(valid, self._mean[block], 0)
+		self._loss[block] = loss
+		self._status[block] = valid & (tx_power[..., None, columns] - loss >= rx_sensitivity[..., rows, None])
+	
+	def update(self):
+		"""
+		Update the status of all links based on the current parameters, in place
+		
+		Parameters
+		----------
+		No parameters
+		
+		Returns
+		-------
+		tuple of ndarray
+			The loss and status of all links. The arrays are owned by the link matrix and 
+			overwritten by the next update
+		"""
+		alive = np.asarray(self.activity, dtype = bool)
+		nr_sensors = alive.shape[-1]
+		
+		if self._version != self.model.version:
+			#the cached losses were calculated with other parameters of the model
+			self._version = self.model.version
+			self.touch()
+		
+		#sensors whose links changed since the last update, in any replica
+		changed = self._dirty | (alive != self._alive).any(axis = tuple(range(alive.ndim - 1)))
+		index = np.flatnonzero(self._dirty)
+		if len(index):
+			self._update_mean(index)
+		self._dirty[:] = False
+		self._alive[:] = alive
+		
+		if self.model.deterministic:
+			#only the rows and columns of the changed sensors are updated, so the links
+			#evaluated are those between alive sensors that involve a changed sensor
+			alive_count = alive.sum(axis = -1)
+			unchanged = alive_count - (alive & changed).sum(axis = -1)
+			self.evaluated = int(np.sum(alive_count*(alive_count - 1) - unchanged*(unchanged - 1)))
+			index = np.flatnonzero(changed)
+			everyone = np.arange(nr_sensors)
+			for rows in self._blocks(len(index)):
+				block = index[rows]
+				valid = alive[..., block, None] & alive[..., None, :] & self._others[block]
+				self._update_status(block, everyone, valid)
+				#the rows of every sensor already cover the columns
+				if len(index) < nr_sensors:
+					self._update_status(everyone, block, np.swapaxes(valid, -1, -2))
+		else:
+			tx_power = np.broadcast_to(np.asarray(self.tx_power, dtype = self._loss.dtype), alive.shape)
+			rx_sensitivity = np.broadcast_to(np.asarray(self.rx_sensitivity, dtype = self._loss.dtype), alive.shape)
+			
+			#the blocks of rows follow the row-major order of every replica, so the shadowing 
+			#drawn is the same sequence as if all links were drawn at once
+			self.evaluated = 0
+			for replica in np.ndindex(alive.shape[:-1]):
+				for rows in self._blocks(nr_sensors):
+					block = replica + (rows,)
+					#only links between two distinct alive sensors are evaluated
+					valid = alive[block][:, None] & alive[replica][None, :] & self._others[rows]
+					count = np.count_nonzero(valid)
+					self.evaluated += count
+					
+					#draw a new shadowing for each link
+					loss = self._loss[block]
+					loss[...] = 0
+					loss[valid] = self._mean[block][valid] + self.model.shadowing(count)
+					#calculate the received power and define the current links status
+					np.logical_and(valid, tx_power[replica][None, :] - loss >= rx_sensitivity[block][:, None], out = self._status[block])
+		
+		return self._loss, self._status
+	
+	def _update_link(self):
+		"""Update the status of all links based on the current parameters."""
+		loss, status = self.update()
+		return loss.copy(), status.copy()
+
+class RadioLinkSparse(BaseLink):
+	"""
+	Class for the radio links among a list of pairs of sensors.
+	
+	Only the listed pairs are evaluated, usually the pairs of sensors within radio range, and the 
+	result is a sparse adjacency in coordinate format.
+	
+	The loss without shadowing of each pair is cached until the pairs or the parameters of the model 
+	change, or until the sensors flagged with ``touch`` change their frequency, while shadowing is drawn again on every update.
+	
+	Required arguments:
+	
+		*tx_power*:
+		Array of doubles (N,), the transmission power of each sensor [dBm].
+		
+		*rx_sensitivity*:
+		Array of doubles (N,), the receiver sensitivity of each sensor [dBm].
+		
+		*distance*:
+		Array of doubles (M,), the distance between the sensors of each pair [m].
+		
+		*frequency*:
+		Array of doubles (N,), the frequency of operation of each sensor [Hz].
+		
+		*activity*:
+		Array of integers (N,), the activity status of each sensor: 0 -> inactive, 1 -> active.
+		
+		*pairs*:
+		Tuple of two arrays of integers (M,), the receiver and the transmitter of each pair.
+	"""
+
+	__slots__ = ("activity", "pairs", "evaluated", "_mean", "_dirty", "_version")
+
+	def __init__(self, tx_power, rx_sensitivity, distance, frequency, activity, pairs, loss = "LDPL", d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0, rng = None, model = None):
+
+		super(RadioLinkSparse, self).__init__(tx_power, rx_sensitivity, distance, frequency, loss, d0, d1, sigma, n0, n1, rng, model)
+		self.activity = activity
+		self.pairs = pairs
+		#number of links evaluated by the last update
+		self.evaluated = 0
+		#loss without shadowing of each pair, calculated on the next update
+		self._mean = None
+		self._dirty = None
+		self._version = None
+	
+	def touch(self, index = None):
+		"""
+		Flag the links transmitted by a set of sensors for update
+		
+		Parameters
+		----------
+		index : {integer, array of integers or boolean mask}
+			The sensors whose frequency changed, all sensors when omitted
+		
+		Returns
+		-------
+		No data returned
+		"""
+		if index is None or self._mean is None:
+			self._mean = None
+		else:
+			self._dirty[index] = True
+	
+	def set_frequency(self, frequency):
+		"""Set the frequency of operation of each sensor and flag all links for update."""
+		self.frequency = frequency
+		self.touch()
+	
+	def set_activity(self, activity):
+		"""
+		Set the activity status of the sensors
+		
+		Parameters
+		----------
+		activity : {array of integers}
+			Activity status of each sensor: 0 -> inactive, 1 -> active
+		
+		Returns
+		-------
+		No data returned
+		"""
+		self.activity = activity
+	
+	def set_pairs(self, pairs, distance):
+		"""
+		Set the pairs of sensors to be evaluated
+		
+		Parameters
+		----------
+		pairs : {tuple of arrays of integers}
+			The receiver and the transmitter of each pair
+		
+		distance : {array of doubles}
+			Distance between the sensors of each pair
+		
+		Returns
+		-------
+		No data returned
+		"""
+		self.pairs = pairs
+		self.distance = distance
+		self.touch()
+	
+	def _update_mean(self):
+		"""Get the loss without shadowing of every pair, recalculating the pairs of the flagged sensors."""
+		rx, tx = self.pairs
+		distance = np.asarray(self.distance)
+		frequency = np.asarray(self.frequency, dtype = float)
+		
+		if self._version != self.model.version:
+			#the cached losses were calculated with other parameters of the model
+			self._mean = None
+			self._version = self.model.version
+		
+		if self._mean is None:
+			#the losses are stored with the precision of the distances
+			self._mean = np.asarray(self.model.mean_loss(distance, frequency[tx]), dtype = np.float32 if distance.dtype == np.float32 else float)
+			self._dirty = np.zeros(len(frequency), dtype = bool)
+		elif self._dirty.any():
+			stale = self._dirty[tx]
+			self._mean[stale] = self.model.mean_loss(distance[stale], frequency[tx[stale]])
+			self._dirty[:] = False
+		return self._mean
+	
+	def _update_link(self):
+		"""
+		Update the status of the listed links based on the current parameters.
+		
+		Returns
+		-------
+		tuple
+			The loss and the status of the links between alive sensors as (data, (rx, tx)) triplets,
+			the coordinate format accepted by ``scipy.sparse.coo_matrix``.
+		"""
+		rx, tx = self.pairs
+		alive = np.asarray(self.activity, dtype = bool)
+		mean = self._update_mean()
+		tx_power = np.asarray(self.tx_power, dtype = mean.dtype)
+		rx_sensitivity = np.asarray(self.rx_sensitivity, dtype = mean.dtype)
+		
+		#only links between two alive sensors are evaluated
+		valid = alive[rx] & alive[tx]
+		rx, tx = rx[valid], tx[valid]
+		self.evaluated = len(rx)
+		
+		#calculate the path loss, the cached loss of deterministic models is only compared with the current radios
+		loss = mean[valid]
+		if not self.model.deterministic:
+			loss += self.model.shadowing(len(loss))
+		#calculated the received power
+		rx_power = tx_power[tx] - loss
+		#define the current links status
+		status = (rx_power >= rx_sensitivity[rx]).astype(int)
+		
+		return (loss, (rx, tx)), (status, (rx, tx))
 
+
+class LinkTable(dict):
+	"""
+	Table of link objects keyed by (rx, tx) pairs of sensors.
+	A link object is only created, by `factory`, the first time its pair is requested, so a network 
+	does not hold a link object per pair of sensors unless all of them are used. Indexing and ``get`` 
+	accept every valid pair and create its link when needed, and ``in`` checks that a pair is valid 
+	without creating its link. ``len``, the iteration, ``keys``, ``values`` and ``items`` only cover 
+	the links created so far, so ``pair in table.keys()`` tells whether the link of a pair was created.
+	
+	Required arguments:
+	
+		*factory*:
+		Callable, ``factory(rx, tx)`` creates the link object of a pair or raises ``KeyError``.
+	
+	Optional arguments:
+	
+		*valid*:
+		Callable, ``valid(rx, tx)`` checks if a pair is valid. Without it only the pairs of the links 
+		created are valid.
+	"""
+	
+	__slots__ = ("factory", "valid")
+	
+	def __init__(self, factory, valid = None):
+		
+		super(LinkTable, self).__init__()
+		self.factory = factory
+		self.valid = valid
+	
+	def __missing__(self, key):
+		rx, tx = key
+		link = self[key] = self.factory(rx, tx)
+		return link
+	
+	def __contains__(self, key):
+		"""Check whether `key` is a valid pair of sensors, without creating its link."""
+		if dict.__contains__(self, key):
+			return True
+		if self.valid is None or not isinstance(key, tuple) or len(key) != 2:
+			return False
+		return bool(self.valid(*key))
+	
+	def get(self, key, default = None):
+		"""Get the link object of a valid pair of sensors, creating it when needed, or `default`."""
+		return self[key] if key in self else default
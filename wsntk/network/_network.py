@@ -4,12 +4,15 @@
 
 """Sensor networks simulation."""
 
-from wsntk.network import SensorNode
-from wsntk.network import RadioLink
+from wsntk.network import SensorNode, SensorState
+from wsntk.network._sensor import SENSOR_MIN_ENERGY, SENSOR_MAX_ENERGY
+from wsntk.network import RadioLink, RadioLinkMatrix, RadioLinkSparse, LinkTable, GridIndex, Connectivity
+from wsntk.network._instrument import Instrumentation, UNTIMED, _CountingGenerator, _sizeof
+from wsntk.network._checkpoint import CHECKPOINT_VERSION, _rng_state, _set_rng_state, _dump_meta, _load_meta
+from wsntk.models import BaseMobilityModel, NoMobility, RandomWalk, RandomWaypoint, GaussMarkov
 
 from abc import ABCMeta, abstractmethod
 
-from numpy.random import rand
 import math
 import numpy as np
 
@@ -36,25 +39,113 @@ class BaseNetwork(metaclass=ABCMeta):
 			Double, the path loss exponent
 
 		*radio*
-			String, the radio type usd on all sensors
-	"""
+			String, the radio type usd on all sensors, or sequence of strings, the radio type of each sensor
+
+		*engine*
+			String, the link engine: "loop" evaluates one ``RadioLink`` per pair of sensors, 
+			"matrix" evaluates all links at once with a ``RadioLinkMatrix`` and "sparse" evaluates 
+			only the pairs within radio range with a ``RadioLinkSparse``
+
+		*margin*
+			Double, the shadowing margin of the sparse engine in multiples of sigma
+
+		*seed*
+			Integer, SeedSequence or Generator, the seed of the random generator of the network
+
+		*replicas*
+			Integer, the number of independent replicas simulated together by the matrix engine
+
+		*output*
+			String, the format of the status and loss yielded by the network: "list", "array" or "packed".
+			The native format of the engine is used when omitted
+
+		*loss_dtype*
+			Data type of the loss yielded by the "array" and "packed" outputs, `dtype` when omitted
 
+		*mobility*
+			String or BaseMobilityModel, the mobility model of all sensors
 
+		*speed*
+			Double, the distance covered by each sensor in one step
 
-	def __init__(self, nr_sensors, dimensions, loss, d0, d1, sigma, n0, n1, radio, consumption, scaling):
+		*connectivity*
+			Boolean, maintain the connectivity metrics of the network and yield them after the loss
+
+		*dtype*
+			Data type of the positions, residual energies, distances and losses, np.float64 or np.float32
+	"""
+
+	link_engines = ("loop", "matrix", "sparse")
+	outputs = ("list", "array", "packed")
+	dtypes = (np.dtype(np.float64), np.dtype(np.float32))
+	fields = ("positions", "residuals", "activities", "status", "loss")
+	mobility_models = {
+		"None": (NoMobility,),
+		"RandomWalk": (RandomWalk,),
+		"RandomWaypoint": (RandomWaypoint,),
+		"GaussMarkov": (GaussMarkov,),
+	}
+
+	def __init__(self, nr_sensors, dimensions, loss, d0, d1, sigma, n0, n1, radio, consumption, scaling, engine = "loop", margin = 3.0, seed = None, replicas = None, output = None, loss_dtype = None, mobility = "None", speed = 1.0, connectivity = False, dtype = np.float64):
+		
+		if engine not in self.link_engines:
+			raise ValueError("The link engine %s is not supported. " % engine)
+		if replicas is not None and engine != "matrix":
+			raise ValueError("Replicas are only supported by the matrix engine.")
+		if output is not None and output not in self.outputs:
+			raise ValueError("The output %s is not supported. " % output)
+		if engine == "sparse" and output in ("list", "packed"):
+			raise ValueError("The output %s is not supported by the sparse engine. " % output)
+		if connectivity and replicas is not None:
+			raise ValueError("Connectivity metrics are not supported with replicas.")
+		if np.dtype(dtype) not in self.dtypes:
+			raise ValueError("The dtype %s is not supported. " % np.dtype(dtype))
 		
 		self.nr_sensors = nr_sensors
 		self.dimensions = dimensions
 		self.radio = radio
 		self.sigma = sigma
 		self.n0 = n0
+		self.engine = engine
+		self.margin = margin
+		self.replicas = replicas
+		self.output = output
+		self.dtype = np.dtype(dtype)
+		self.loss_dtype = self.dtype if loss_dtype is None else np.dtype(loss_dtype)
+		#without a seed the global numpy generator is used, as in np.random.seed()
+		self.rng = np.random if seed is None else np.random.default_rng(seed)
+		self.mob_model = self._set_mobility(mobility, speed)
+		self.connectivity = Connectivity(nr_sensors) if connectivity else None
+		self.instrumentation = None
 		
 		self.sensors, self.links = self._init_simulation(nr_sensors, dimensions, radio, consumption, scaling, loss, d0, d1, sigma, n0, n1)
 					
 	
+	def _set_mobility(self, mobility, speed):
+		"""Set ``Mobility Class`` object for str ``mobility``, drawing from the generator of the network. """
+		if isinstance(mobility, BaseMobilityModel):
+			return mobility
+		try:
+			model_ = self.mobility_models[mobility]
+			model_class, args = model_[0], model_[1:]
+			if mobility != "None":
+				args = (speed,)
+			return model_class(*args, rng = self.rng)
+		except KeyError as e:
+			raise ValueError("The mobility model %s is not supported. " % mobility) from e
+	
 	def _init_simulation(self, nr_sensors, dimensions, radio, consumption, scaling, loss, d0, d1, sigma, n0, n1):
 		
 		sensors = self._init_sensors(nr_sensors, dimensions, radio, consumption, scaling)
+		self.link_matrix = None
+		self.link_sparse = None
+		self.index = None
+		if self.engine == "matrix":
+			#all links are held by a single matrix object
+			self.link_matrix = self._init_link_matrix(sensors, loss, d0, d1, sigma, n0, n1)
+		elif self.engine == "sparse":
+			#only the links within radio range are held, by a single sparse object
+			self.link_sparse = self._init_link_sparse(sensors, loss, d0, d1, sigma, n0, n1)
 		links = self._init_links(sensors, loss, d0, d1, sigma, n0, n1)
 					
 		return sensors, links
@@ -63,54 +154,524 @@ class BaseNetwork(metaclass=ABCMeta):
 	def _init_sensors(self, nr_sensors, dimensions, radio, consumption, scaling):
 		"""Initializes the simulaiton creating all sensors with respective configuration. """                
 		
-		sensors = []
-		#instantiate all sensors
-		for i in range (nr_sensors):
-			#instantiate a sensor
-			sensor = SensorNode(dimensions, radio, consumption, scaling)
-			#Add sensor to the network
-			sensors.append(sensor)
+		#the network owns the state of all sensors
+		state = self.state = SensorState(nr_sensors, len(dimensions), self.replicas, self.dtype)
+		#all sensors share the same consumption model
+		self.cons_model = SensorNode._set_consumption(consumption, scaling)
+		
+		#place all sensors at once, drawing the positions in the order of one draw per sensor
+		positions = self.rng.random((nr_sensors,) + state.positions.shape[:-2] + state.positions.shape[-1:])
+		state.positions[:] = np.moveaxis(positions, 0, -2) * dimensions
 		
-		return sensors
+		#configure all radios at once, the parameters of each sensor are broadcast over the replicas
+		if not isinstance(radio, str) and len(radio) != nr_sensors:
+			raise ValueError("The number of radios %d does not match the number of sensors %d." % (len(radio), nr_sensors))
+		for param, values in SensorNode._get_radio_arrays(radio).items():
+			getattr(state, param)[:] = values
+		state.tx_power[:] = state.max_tx_power
+		state.activity[:] = 1
+		state.residual[:] = SENSOR_MAX_ENERGY
+		
+		#the sensors are views onto the rows of the state
+		return [SensorNode.view(dimensions, state, i, self.cons_model) for i in range(nr_sensors)]
 	
 	def _init_links(self, sensors, loss, d0, d1, sigma, n0, n1):
-		"""Initializes the simulaiton creating all links with respective configuration. """                
+		"""Initializes the table of link objects, each link is created the first time it is requested. """
 		
-		links = {}
-		for rx_sensor in sensors:
-			for tx_sensor in sensors:
-				if rx_sensor != tx_sensor:
-					distance = self._distance(rx_sensor.get_position(), tx_sensor.get_position())
-					#instantiate a sensor
-					link = RadioLink(tx_sensor.tx_power, rx_sensor.rx_sensitivity, distance, tx_sensor.frequency, loss, d0, d1, sigma, n0, n1)
-					#Add links to the dictionary
-					links[sensors.index(rx_sensor), sensors.index(tx_sensor)] = link
+		#all link objects share one propagation model, the model of the link engine if there is one
+		engine = self.link_matrix if self.link_matrix is not None else self.link_sparse
+		self._link_model = engine.model if engine is not None else RadioLink._init_link(loss, d0, d1, sigma, n0, n1, self.rng)
+		return LinkTable(self._create_link, self._valid_pair)
+	
+	def _valid_pair(self, rx, tx):
+		"""Check if (rx, tx) is a pair of distinct sensors of the network."""
+		if self.replicas is not None:
+			raise ValueError("Link objects are not supported with replicas.")
+		nr_sensors = len(self.state)
+		return isinstance(rx, (int, np.integer)) and isinstance(tx, (int, np.integer)) and rx != tx and 0 <= rx < nr_sensors and 0 <= tx < nr_sensors
+	
+	def _create_link(self, rx, tx):
+		"""Create the link object of a pair of sensors with their current parameters."""
+		state = self.state
+		if not self._valid_pair(rx, tx):
+			raise KeyError((rx, tx))
+		
+		distance = self._distance(state.positions[rx], state.positions[tx])
+		return RadioLink(state.tx_power[tx], state.rx_sensitivity[rx], distance, state.frequency[tx], model = self._link_model)
+	
+	def _init_link_matrix(self, sensors, loss, d0, d1, sigma, n0, n1):
+		"""Initializes the simulaiton creating a single link matrix for all pairs of sensors. """
+		
+		state = self.state
+		return RadioLinkMatrix(state.tx_power, state.rx_sensitivity, self._distances(state.positions), state.frequency, state.activity, loss, d0, d1, sigma, n0, n1, self.rng)
+	
+	def _init_link_sparse(self, sensors, loss, d0, d1, sigma, n0, n1):
+		"""Initializes the simulaiton creating a spatial index and a single sparse link object for the pairs of sensors within radio range. """
+		
+		state = self.state
+		link_sparse = RadioLinkSparse(state.tx_power, state.rx_sensitivity, np.empty(0, dtype = self.dtype), state.frequency, state.activity, (np.empty(0, dtype = int), np.empty(0, dtype = int)), loss, d0, d1, sigma, n0, n1, self.rng)
+		
+		self.index = GridIndex(self._radio_range(link_sparse.model))
+		self.index.update(state.positions)
+		rx, tx, distance = self.index.pairs()
+		link_sparse.set_pairs((rx, tx), distance)
+		
+		return link_sparse
+	
+	def _radio_range(self, model):
+		"""
+		Calculate the maximum distance at which any pair of sensors may be connected.
+		
+		The link budget is the largest transmission power minus the best receiver sensitivity, 
+		plus a shadowing margin of `margin` standard deviations. The lowest frequency gives the longest range.
+		
+		Parameters
+		----------
+		model : {BasePropagationModel}
+			The propagation model of the links
 		
-		return links
+		Returns
+		-------
+		double
+			The radio range [m]
+		"""
+		state = self.state
+		if len(state) == 0:
+			return 0.0
+		
+		budget = state.max_tx_power.max() - state.rx_sensitivity.min() + self.margin*model.sigma
+		return model.max_distance(budget, state.frequency.min())
 	
 	def _get_link(self, rx_sensor, tx_sensor):
 		"""Get the repectve link object for a pair of sensors"""
-		return self.links[self.sensors.index(rx_sensor), self.sensors.index(tx_sensor)]
+		return self.links[rx_sensor._index, tx_sensor._index]
 	
 	def _distance(self, pos_a, pos_b):
 		"""Calculate the euclidean distance between two positions"""
 		return (math.sqrt(((pos_a[0]-pos_b[0])**2)+((pos_a[1]-pos_b[1])**2)))
+	
+	def _distances(self, positions, index = None):
+		"""Calculate the euclidean distance between every pair of positions, or from the positions in `index` to all positions"""
+		origin = positions if index is None else positions[..., index, :]
+		#the squares are summed one coordinate at a time, so no (..., K, N, ndim) array is created
+		distance = np.zeros(origin.shape[:-1] + positions.shape[-2:-1], dtype = np.result_type(origin, positions))
+		for axis in range(positions.shape[-1]):
+			delta = origin[..., :, None, axis] - positions[..., None, :, axis]
+			distance += np.square(delta, out = delta)
+		return np.sqrt(distance, out = distance)
 
 	def __iter__(self):
 		"""Generator which returns the current links and sensors after update."""
 		while True:
-			positions, residuals, activities = self._update_sensors()
-			status, loss = self._update_links()
-			yield positions,residuals,activities,status,loss
+			with self._phase("sensors"):
+				positions, residuals, activities = self._update_sensors()
+			with self._phase("links"):
+				status, loss = self._update_links(copy = self._copy_links())
+			with self._phase("output"):
+				outputs = self._format_output(positions, residuals, activities, status, loss)
+			self._end_step()
+			yield outputs
+	
+	def _phase(self, name):
+		"""Get the context manager timing a phase of the current step, which does nothing without instrumentation."""
+		if self.instrumentation is None:
+			return UNTIMED
+		return self.instrumentation.phase(name)
+	
+	def _end_step(self):
+		"""Count the links evaluated by the current step and close it, when the network is instrumented."""
+		instrumentation = self.instrumentation
+		if instrumentation is None:
+			return
+		
+		pairs = self.nr_sensors*(self.nr_sensors - 1)*(self.replicas or 1)
+		evaluated = self._links_evaluated()
+		instrumentation.count("links_evaluated", evaluated)
+		instrumentation.count("links_skipped", pairs - evaluated)
+		instrumentation.memory.update(self._nbytes())
+		instrumentation.end_step()
+	
+	def _links_evaluated(self):
+		"""Get the number of links evaluated by the last update of the links."""
+		if self.link_matrix is not None:
+			return self.link_matrix.evaluated
+		if self.link_sparse is not None:
+			return self.link_sparse.evaluated
+		#the loop engine evaluates every link between two alive sensors
+		alive = int(np.count_nonzero(self.state.activity))
+		return alive*(alive - 1)
+	
+	def _nbytes(self):
+		"""Get the bytes held by the state of the sensors and by the links."""
+		state = self.state
+		sensors = state.dirty.nbytes + sum(getattr(state, column).nbytes for column in state.columns)
+		
+		if self.link_matrix is not None:
+			link_matrix = self.link_matrix
+			links = sum(np.asarray(array).nbytes for array in (link_matrix.distance, link_matrix._mean, link_matrix._loss, link_matrix._status, link_matrix._alive, link_matrix._dirty))
+		elif self.link_sparse is not None:
+			rx, tx, distance = self.index.pairs()
+			link_sparse = self.link_sparse
+			links = rx.nbytes + tx.nbytes + distance.nbytes + sum(np.asarray(array).nbytes for array in link_sparse.pairs) + np.asarray(link_sparse.distance).nbytes
+			if link_sparse._mean is not None:
+				links += link_sparse._mean.nbytes
+		else:
+			links = 0
+		#the link objects created so far and their shared propagation model
+		links += sum(_sizeof(link) for link in self.links.values()) + _sizeof(self._link_model)
+		
+		return {"sensors": sensors, "links": links}
+	
+	def _rng_holders(self):
+		"""Get the objects that draw from the random generator of the network."""
+		#the link objects and the link engines share the propagation model
+		return [self.mob_model, self._link_model]
+	
+	def instrument(self, *listeners):
+		"""
+		Instrument the steps of the network
+		
+		The instrumentation times the update of the sensors, of the links and the conversion of the 
+		outputs, counts the links evaluated and skipped and the random numbers drawn, and measures the 
+		bytes held by the state of the sensors and by the links after each step. The steps run by the 
+		iterator, ``advance`` and ``fast_forward`` are all instrumented. The steps skipped by 
+		``fast_forward`` are counted as "steps_skipped" with the step it simulates. Without 
+		instrumentation the steps are not timed.
+		
+		Parameters
+		----------
+		listeners : {callable}
+			Called as ``listener(step, timers, counters)`` after each step
+		
+		Returns
+		-------
+		Instrumentation
+			The instrumentation of the network, its ``summary`` and ``report`` describe the steps run since
+		"""
+		if self.instrumentation is not None:
+			self.uninstrument()
+		
+		self.instrumentation = Instrumentation(*listeners)
+		for holder in self._rng_holders():
+			holder.rng = _CountingGenerator(holder.rng, self.instrumentation)
+		self.instrumentation.memory.update(self._nbytes())
+		return self.instrumentation
+	
+	def uninstrument(self):
+		"""
+		Remove the instrumentation of the steps
+		
+		Parameters
+		----------
+		No parameters
+		
+		Returns
+		-------
+		Instrumentation
+			The removed instrumentation, None if the network was not instrumented
+		"""
+		instrumentation = self.instrumentation
+		for holder in self._rng_holders():
+			if isinstance(holder.rng, _CountingGenerator):
+				holder.rng = holder.rng.rng
+		self.instrumentation = None
+		return instrumentation
+	
+	def _generators(self):
+		"""Get the random generators of the network, by name, unwrapped from the instrumentation."""
+		generators = {"rng": self.rng}
+		for name, holder in (("mobility", self.mob_model), ("links", self._link_model)):
+			rng = holder.rng.rng if isinstance(holder.rng, _CountingGenerator) else holder.rng
+			#a mobility model created by the user may draw from its own generator
+			if rng is not self.rng:
+				generators[name] = rng
+		return generators
+	
+	def save_checkpoint(self, file):
+		"""
+		Save the state of the simulation
+		
+		The checkpoint holds arrays only: the state of the sensors, the state of the mobility model, of 
+		the link engine and of the connectivity metrics, and the state of the random generators, the 
+		global numpy generator for networks without seed. The configuration of the network is not saved, 
+		the checkpoint is restored by ``load_checkpoint`` into a network created with the same arguments.
+		
+		Parameters
+		----------
+		file : {string or file}
+			The file, in the ``np.savez`` format. The ".npz" extension is appended to names without it
+		
+		Returns
+		-------
+		No data returned
+		"""
+		state = self.state
+		arrays = {"state." + column: getattr(state, column) for column in state.columns}
+		arrays["state.dirty"] = state.dirty
+		
+		for name in self.mob_model.state_attributes:
+			value = getattr(self.mob_model, name)
+			if value is not None:
+				arrays["mobility." + name] = value
+		
+		if self.link_matrix is not None:
+			link_matrix = self.link_matrix
+			arrays.update({"links.distance": link_matrix.distance, "links.mean": link_matrix._mean, "links.loss": link_matrix._loss, 
+				"links.status": link_matrix._status, "links.alive": link_matrix._alive, "links.dirty": link_matrix._dirty})
+		if self.link_sparse is not None:
+			index = self.index
+			arrays.update({"index.positions": index.positions, "index.rx": index.rx, "index.tx": index.tx, "index.distance": index.distance})
+		
+		if self.connectivity is not None:
+			connectivity = self.connectivity
+			arrays.update({"connectivity.labels": connectivity.labels, "connectivity.degree": connectivity.degree, "connectivity.edges": connectivity.edges})
+		
+		meta = {
+			"version": CHECKPOINT_VERSION,
+			"nr_sensors": self.nr_sensors,
+			"ndim": state.positions.shape[-1],
+			"replicas": self.replicas,
+			"dtype": self.dtype.name,
+			"engine": self.engine,
+			"mobility": type(self.mob_model).__name__,
+			"connectivity": self.connectivity is not None,
+			"recomputes": None if self.connectivity is None else self.connectivity.recomputes,
+			"generators": {name: _rng_state(rng) for name, rng in self._generators().items()},
+		}
+		np.savez(file, meta = _dump_meta(meta), **arrays)
+	
+	def load_checkpoint(self, file):
+		"""
+		Restore the state of the simulation saved by ``save_checkpoint``
+		
+		The network must be created with the arguments of the network that saved the checkpoint. The 
+		following steps are then identical to the steps of the network that saved it.
+		
+		Parameters
+		----------
+		file : {string or file}
+			The file written by ``save_checkpoint``
+		
+		Returns
+		-------
+		No data returned
+		"""
+		with np.load(file, allow_pickle = False) as data:
+			meta = _load_meta(data["meta"])
+			if meta["version"] != CHECKPOINT_VERSION:
+				raise ValueError("The checkpoint version %s is not supported. " % meta["version"])
+			
+			generators = self._generators()
+			expected = {"nr_sensors": self.nr_sensors, "ndim": self.state.positions.shape[-1], "replicas": self.replicas, "dtype": self.dtype.name, "engine": self.engine, 
+				"mobility": type(self.mob_model).__name__, "connectivity": self.connectivity is not None}
+			for key, value in expected.items():
+				if meta[key] != value:
+					raise ValueError("The checkpoint %s %s does not match the network %s %s." % (key, meta[key], key, value))
+			if set(meta["generators"]) != set(generators):
+				raise ValueError("The checkpoint random generators %s do not match the network." % sorted(meta["generators"]))
+			
+			#the state arrays are shared with the link engines, so they are restored in place
+			state = self.state
+			for column in state.columns:
+				getattr(state, column)[...] = data["state." + column]
+			state.dirty[...] = data["state.dirty"]
+			
+			for name in self.mob_model.state_attributes:
+				key = "mobility." + name
+				setattr(self.mob_model, name, data[key].copy() if key in data else None)
+			
+			if self.link_matrix is not None:
+				link_matrix = self.link_matrix
+				link_matrix.distance[...] = data["links.distance"]
+				link_matrix._mean[...] = data["links.mean"]
+				link_matrix._loss[...] = data["links.loss"]
+				link_matrix._status[...] = data["links.status"]
+				link_matrix._alive[...] = data["links.alive"]
+				link_matrix._dirty[...] = data["links.dirty"]
+			if self.link_sparse is not None:
+				index = self.index
+				index.positions, index.rx, index.tx, index.distance = (data["index." + name] for name in ("positions", "rx", "tx", "distance"))
+				self.link_sparse.set_pairs((index.rx, index.tx), index.distance)
+			#the link objects are created again from the restored state when requested
+			self.links.clear()
+			
+			if self.connectivity is not None:
+				connectivity = self.connectivity
+				connectivity.labels, connectivity.degree, connectivity.edges = (data["connectivity." + name] for name in ("labels", "degree", "edges"))
+				connectivity.recomputes = meta["recomputes"]
+			
+			for name, rng in generators.items():
+				_set_rng_state(rng, meta["generators"][name])
+	
+	def _format_output(self, positions, residuals, activities, status, loss):
+		"""
+		Convert the outputs of one step to the format selected by `output`.
+		
+		The "list" output holds the residuals, activities, status and loss in lists, as the loop engine does. 
+		The "array" output holds them in arrays, with a boolean status and a loss of type `loss_dtype`. 
+		The "packed" output is the "array" output with the status packed into bits along the transmitter 
+		axis by ``np.packbits``, it is restored by ``np.unpackbits(status, axis = -1, count = nr_sensors).astype(bool)``.
+		The sparse engine yields the data of the "array" output in (data, (rx, tx)) triplets.
+		The connectivity metrics, when maintained, follow the loss.
+		"""
+		metrics = ()
+		if self.connectivity is not None:
+			metrics = (self.connectivity.update(status, activities),)
+		
+		output = self.output
+		if output is None:
+			#the loop engine yields lists and the vectorized engines yield arrays
+			output = "list" if self.engine == "loop" else None
+		
+		if output == "list":
+			#the loop engine builds the status and loss lists itself, with an integer status
+			if not isinstance(status, list):
+				status, loss = np.asarray(status, dtype = int).tolist(), loss.tolist()
+			return (positions, residuals.tolist(), activities.tolist(), status, loss) + metrics
+		
+		status, loss = self._format_links(status, loss)
+		return (positions, residuals, activities, status, loss) + metrics
+	
+	def _copy_links(self):
+		"""Check if the status and loss of the engine must be copied, the "list", "array" and "packed" outputs convert them to new objects."""
+		return self.output is None
+	
+	def _format_links(self, status, loss, copy = True):
+		"""
+		Convert the status and loss to the "array" or "packed" output, other outputs are returned unchanged.
+		
+		The status and loss may be the buffers of the link engine, they are converted straight into new 
+		arrays. Without `copy` the converted arrays may share the buffers of the engine. The matrix engine 
+		stores its status as booleans, its default output converts it to integers like the other engines.
+		"""
+		if self.output is None and self.engine == "matrix":
+			return np.asarray(status, dtype = int), loss
+		if self.output not in ("array", "packed"):
+			return status, loss
+		
+		if self.engine == "sparse":
+			(status, pairs), (loss, _) = status, loss
+			return (status.astype(bool), pairs), (loss.astype(self.loss_dtype, copy = False), pairs)
+		
+		convert = np.array if copy else np.asarray
+		if self.output == "packed":
+			status = np.packbits(np.asarray(status, dtype = bool), axis = -1)
+		else:
+			status = convert(status, dtype = bool)
+		loss = convert(loss, dtype = self.loss_dtype)
+		return status, loss
+	
+	def advance(self, n, record = None):
+		"""
+		Run several simulation steps in a single call
+		
+		The steps run in a tight loop over the state of the network, without building the outputs of 
+		the intermediate steps, so it is faster than iterating over the network when only the final 
+		state or a few fields are needed. The network can be iterated or advanced again afterwards.
+		
+		Parameters
+		----------
+		n : {integer}
+			The number of steps, at least 1
+		
+		record : {string or tuple of strings}
+			The fields stacked over the steps, among "positions", "residuals", "activities", "status" 
+			and "loss". Only the final step is returned when omitted
+		
+		Returns
+		-------
+		tuple or dict
+			Without `record`, the outputs of the last step as yielded by the iterator. Otherwise a 
+			dictionary mapping each recorded field to an array (n, ...) with its value at every step, 
+			in the "array" or "packed" format when selected by `output`
+		"""
+		fields = ()
+		if record is not None:
+			fields = (record,) if isinstance(record, str) else tuple(record)
+			for field in fields:
+				if field not in self.fields:
+					raise ValueError("The field %s is not supported. " % field)
+				if self.engine == "sparse" and field in ("status", "loss"):
+					raise ValueError("The field %s is sparse, only dense outputs can be recorded. " % field)
+		if n < 1:
+			raise ValueError("The number of steps must be at least 1.")
+		
+		buffers = {}
+		for step in range(n):
+			last = step == n - 1 and not fields
+			#the state and link arrays are only copied for the outputs of the last step
+			with self._phase("sensors"):
+				positions, residuals, activities = self._update_sensors(copy = last)
+			with self._phase("links"):
+				status, loss = self._update_links(copy = last and self._copy_links())
+			if last:
+				with self._phase("output"):
+					outputs = self._format_output(positions, residuals, activities, status, loss)
+				self._end_step()
+				return outputs
+			
+			if fields:
+				with self._phase("output"):
+					#the recorded values are copied into the buffers
+					status, loss = self._format_links(status, loss, copy = False)
+					values = dict(zip(self.fields, (positions, residuals, activities, status, loss)))
+					for field in fields:
+						if field not in buffers:
+							#preallocated on the first step, when the shape of each field is known
+							value = np.asarray(values[field])
+							buffers[field] = np.empty((n,) + value.shape, dtype = value.dtype)
+						buffers[field][step] = values[field]
+			self._end_step()
+		
+		return buffers
+	
+	def fast_forward(self, max_steps = None):
+		"""
+		Advance to the next step at which an active sensor runs out of energy
+		
+		The energy consumed by the skipped steps is calculated in closed form by the consumption model, 
+		and only the last step is simulated. The skipped steps change neither the positions nor the 
+		activities, so the final state matches the one reached step by step, up to rounding. Their 
+		shadowing is not drawn, so the random generator is not advanced by them.
+		
+		Parameters
+		----------
+		max_steps : {integer}
+			The maximum number of steps advanced. It is required when no active sensor consumes energy
+		
+		Returns
+		-------
+		tuple
+			(steps, outputs) the number of steps advanced and the outputs of the last step, 
+			as yielded by the iterator
+		"""
+		if self.mob_model.mobile:
+			raise ValueError("Mobile sensors can not be fast forwarded.")
+		
+		state = self.state
+		steps = self.cons_model.steps_to_threshold(state.residual, state.tx_power, SENSOR_MIN_ENERGY)
+		steps = np.min(steps[state.activity.astype(bool)], initial = np.inf)
+		if max_steps is not None:
+			steps = min(steps, max_steps)
+		if steps == np.inf:
+			raise ValueError("No active sensor runs out of energy, max_steps is required.")
+		steps = max(int(steps), 1)
+		
+		#the skipped steps only consume energy, they are counted with the simulated step by the instrumentation
+		with self._phase("sensors"):
+			state.residual *= self.cons_model.decay(state.tx_power, steps - 1)
+		if self.instrumentation is not None:
+			self.instrumentation.count("steps_skipped", steps - 1)
+		return steps, self.advance(1)
 			
 	@abstractmethod
-	def _update_sensors(self):
-		"""Update the sensors status: position, energy, etc."""
+	def _update_sensors(self, copy = True):
+		"""Update the sensors status: position, energy, etc. Without `copy` the state arrays are returned."""
 		raise NotImplementedError
 
 	@abstractmethod
-	def _update_links(self):
-		"""update the links status based on the new sensors status."""
+	def _update_links(self, copy = True):
+		"""update the links status based on the new sensors status. Without `copy` the arrays of the engine may be returned."""
 		raise notimplementederror
 	   
     
@@ -137,29 +698,94 @@ class SensorNetwork(BaseNetwork):
 			Double, the path loss exponent
 
 		  *radio*
-			String, the radio type usd on all sensors
+			String, the radio type usd on all sensors (default "DEFAULT"), or sequence of strings, the radio 
+			type of each sensor. Radios are added to ``RADIO_CONFIG`` by ``register_radio``
+		  
+		  *engine*
+			String, the link engine: "loop" (default), "matrix" or "sparse". The matrix engine returns 
+			the status and loss of all links as ``ndarray`` objects of shape (N, N), with an integer 
+			status like the other engines. The sparse engine
+			evaluates only the pairs of sensors within radio range and returns the status and loss as 
+			(data, (rx, tx)) triplets, the coordinate format accepted by ``scipy.sparse.coo_matrix``
+
+		  *margin*
+			Double, the shadowing margin of the sparse engine in multiples of sigma. Links whose 
+			shadowing exceeds the margin are never evaluated
+
+		  *seed*
+			Integer, SeedSequence or Generator, the seed of the random generator used to place the sensors 
+			and to draw shadowing. Networks with their own generator do not interfere with each other. 
+			The global numpy generator is used when omitted
+
+		  *replicas*
+			Integer, the number of replicas of the scenario simulated together, matrix engine only. 
+			Each replica has its own deployment and shadowing, drawn from the same generator, and 
+			every output gains a leading replica axis: positions (R, N, ndim), residuals and 
+			activities (R, N), status and loss (R, N, N)
+
+		  *output*
+			String, the format of the yielded outputs. "list" yields the residuals, activities, status 
+			and loss as lists, the default of the loop engine. "array" yields them as ``ndarray`` objects, 
+			with a boolean status and a loss of type `loss_dtype`, the default of the vectorized engines 
+			apart from the types. "packed" also packs the status into bits along the transmitter axis with 
+			``np.packbits``, an (N, ceil(N/8)) array of ``uint8``. The sparse engine only supports "array"
+
+		  *loss_dtype*
+			Data type of the loss yielded by the "array" and "packed" outputs, np.float64 or np.float32. 
+			It follows `dtype` when omitted
+
+		  *mobility*
+			String, the mobility model: "None" (default), "RandomWalk", "RandomWaypoint" or "GaussMarkov", 
+			or a ``BaseMobilityModel`` object. All sensors are moved at once, every step, before their 
+			energy is updated
+
+		  *speed*
+			Double, the distance covered by each sensor in one step [m]
+
+		  *connectivity*
+			Boolean, maintain the connectivity metrics of the network, yielded as a sixth output: 
+			a dictionary with the component of each sensor ("labels"), the number of components with 
+			active sensors ("components"), the number of neighbors of each sensor ("degree"), the active 
+			sensors without neighbors ("isolated") and whether the network is "partitioned". Two sensors 
+			are neighbors when a link between them is up in either direction. Replicas are not supported
+
+		  *dtype*
+			Data type of the state of the sensors and of the links: np.float64 (default) or np.float32, 
+			which halves the memory of the positions, residual energies, distances and losses of the 
+			vectorized engines. The propagation losses are then calculated in single precision, within 
+			about 1e-4 dB of double precision. The shadowing is drawn in double precision, so both types 
+			draw the same numbers. The link objects of the loop engine always use double precision
 	"""
-	def __init__(self, nr_sensors, dimensions, loss = "FSPL", d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0,  radio = "DEFAULT", consumption = "None", scaling = 1.0):
+	def __init__(self, nr_sensors, dimensions, loss = "FSPL", d0 = 1.0, d1 = 10.0, sigma = 0.0, n0 = 2.0, n1 = 3.0,  radio = "DEFAULT", consumption = "None", scaling = 1.0, engine = "loop", margin = 3.0, seed = None, replicas = None, output = None, loss_dtype = None, mobility = "None", speed = 1.0, connectivity = False, dtype = np.float64):
 		
-		super(SensorNetwork, self).__init__(nr_sensors, dimensions, loss, d0, d1, sigma, n0, n1, radio, consumption, scaling)
+		super(SensorNetwork, self).__init__(nr_sensors, dimensions, loss, d0, d1, sigma, n0, n1, radio, consumption, scaling, engine, margin, seed, replicas, output, loss_dtype, mobility, speed, connectivity, dtype)
 	
-	def _update_sensors(self):
-		positions = np.empty((0, len(self.dimensions)))
-		energy_residuals = []
-		activities = []
+	def _update_sensors(self, copy = True):
+		state = self.state
+		
+		#move all sensors at once and flag their links for update
+		if self.mob_model.mobile:
+			self.mob_model.move(state.positions, self.dimensions)
+			state.touch(slice(None))
 		
-		for sensor in self.sensors:
-			position, energy, activity = next(iter(sensor))
-			positions = np.append(positions, position.reshape(1,len(self.dimensions)), axis = 0)
-			energy_residuals.append(energy)
-			activities.append(activity)
-		return positions, energy_residuals, activities
+		#update the energy and the activity of all sensors at once
+		state.residual *= self.cons_model.consumption(state.tx_power)
+		np.greater(state.residual, SENSOR_MIN_ENERGY, out = state.activity, casting = "unsafe")
+		
+		if copy:
+			return state.positions.copy(), state.residual.copy(), state.activity.copy()
+		return state.positions, state.residual, state.activity
  
 	def _sensors_alive(self, tx_sensor, rx_sensor):
 		#check if both sensors of a link are alive
 		return (tx_sensor.get_activity() and rx_sensor.get_activity())
 		
-	def _update_links(self):
+	def _update_links(self, copy = True):
+		if self.engine == "matrix":
+			return self._update_link_matrix(copy)
+		if self.engine == "sparse":
+			return self._update_link_sparse()
+		
 		list_status = []
 		list_loss = []
 		for rx_sensor in self.sensors:
@@ -191,6 +817,44 @@ class SensorNetwork(BaseNetwork):
 				aux_loss.append(loss)
 			list_status.append(aux_status)
 			list_loss.append(aux_loss)
+		self.state.clean()
 			
 		return list_status, list_loss
-    
+	
+	def _update_link_matrix(self, copy = True):
+		state = self.state
+		
+		#the link matrix shares the state arrays, only the links of sensors that moved
+		#or changed their radio settings are flagged for update
+		index = state.clean()
+		if len(index):
+			self.link_matrix.set_distance_rows(index, self._distances(state.positions, index))
+		
+		#get the updated status and loss
+		loss, status = self.link_matrix.update()
+		
+		if copy:
+			return status.copy(), loss.copy()
+		return status, loss
+	
+	def _update_link_sparse(self):
+		state = self.state
+		
+		#the neighbor pairs are only rebuilt when the sensors move
+		if self.index.update(state.positions):
+			rx, tx, distance = self.index.pairs()
+			self.link_sparse.set_pairs((rx, tx), distance)
+		
+		#the link object shares the state arrays, the sensors whose radio settings changed are flagged 
+		#so only their cached loss is recalculated
+		self.link_sparse.set_txpower(state.tx_power)
+		self.link_sparse.set_rxsensitivity(state.rx_sensitivity)
+		self.link_sparse.set_activity(state.activity)
+		index = state.clean()
+		if len(index):
+			self.link_sparse.touch(index)
+		
+		#get the updated status and loss
+		loss, status = next(iter(self.link_sparse))
+		
+		return status, loss
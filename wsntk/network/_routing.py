@@ -0,0 +1,192 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""Multi-hop routing over the links of sensor networks."""
+
+import heapq
+import numpy as np
+
+class Router(object):
+	"""
+	Router class.
+	This class maintains the shortest path trees towards a set of sinks over the links of a network.
+	A sensor routes through a link when the link is up from the sensor to its next hop, and the cost of
+	a route is the sum of the loss of its links or its number of hops. The trees are built by Dijkstra's
+	algorithm the first time a sink is routed and cached. When links change, only the sensors whose
+	routes used a link that went down or became more expensive are routed again, and the cheaper links
+	are relaxed from the current trees.
+
+	Required arguments:
+
+		*nr_sensors*:
+			Integer, the number of sensors.
+
+	Optional arguments:
+
+		*metric*:
+			String, the cost of each link: "loss" (default) or "hops".
+	"""
+
+	metrics = ("loss", "hops")
+
+	def __init__(self, nr_sensors, metric = "loss"):
+
+		if metric not in self.metrics:
+			raise ValueError("The routing metric %s is not supported. " % metric)
+
+		self.nr_sensors = nr_sensors
+		self.metric = metric
+		#weights[rx, tx] is the cost of sending from tx to rx, infinite when the link is down
+		self.weights = np.full((nr_sensors, nr_sensors), np.inf)
+		self._trees = {}
+
+	def _weights(self, status, loss):
+		"""Calculate the cost of each link from its status and loss."""
+		nr_sensors = self.nr_sensors
+		if isinstance(status, tuple):
+			#the sparse engine returns the status and loss as (data, (rx, tx))
+			(data, (rx, tx)), (loss_data, _) = status, loss
+			status = np.zeros((nr_sensors, nr_sensors), dtype = bool)
+			status[rx, tx] = data
+			loss = np.zeros((nr_sensors, nr_sensors))
+			loss[rx, tx] = loss_data
+
+		up = np.asarray(status, dtype = bool)
+		if self.metric == "hops":
+			return np.where(up, 1.0, np.inf)
+		#a shadowing gain below zero loss would break the search
+		return np.where(up, np.maximum(np.asarray(loss, dtype = float), 0), np.inf)
+
+	def update(self, status, loss = None):
+		"""
+		Update the links and repair the cached trees
+
+		Parameters
+		----------
+		status : {array_like or tuple}
+			Status of the links, a dense (N, N) matrix or a sparse (data, (rx, tx)) triplet
+
+		loss : {array_like or tuple}
+			Loss of the links, in the format of `status`. Only required by the "loss" metric
+
+		Returns
+		-------
+		No data returned
+		"""
+		weights = self._weights(status, loss)
+		increased = np.nonzero(weights > self.weights)
+		decreased = np.nonzero(weights < self.weights)
+		self.weights = weights
+
+		for cost, next_hop in self._trees.values():
+			self._repair(cost, next_hop, increased, decreased)
+
+	def route(self, sink):
+		"""
+		Get the routes of all sensors towards a sink
+
+		Parameters
+		----------
+		sink : {integer}
+			The index of the sink
+
+		Returns
+		-------
+		tuple of ndarray
+			The next hop of each sensor, -1 for the sink and the sensors without route, and the cost of
+			the route of each sensor, infinite for the sensors without route
+		"""
+		if sink not in self._trees:
+			self._trees[sink] = self._build(sink)
+		cost, next_hop = self._trees[sink]
+		return next_hop.copy(), cost.copy()
+
+	def path(self, source, sink):
+		"""
+		Get the route of a sensor towards a sink
+
+		Parameters
+		----------
+		source, sink : {integer}
+			The indexes of the sensor and the sink
+
+		Returns
+		-------
+		list of integers
+			The sensors of the route from `source` to `sink`, empty if there is no route
+		"""
+		next_hop, cost = self.route(sink)
+		if cost[source] == np.inf:
+			return []
+
+		path = [source]
+		while path[-1] != sink:
+			path.append(int(next_hop[path[-1]]))
+		return path
+
+	def _build(self, sink):
+		"""Build the shortest path tree towards a sink."""
+		cost = np.full(self.nr_sensors, np.inf)
+		next_hop = np.full(self.nr_sensors, -1)
+		cost[sink] = 0
+		self._search(cost, next_hop, [(0.0, sink)])
+		return cost, next_hop
+
+	def _search(self, cost, next_hop, heap):
+		"""Run Dijkstra's algorithm from the sensors in `heap`, updating the costs and next hops in place."""
+		weights = self.weights
+		while heap:
+			distance, node = heapq.heappop(heap)
+			if distance > cost[node]:
+				continue
+
+			#the sensors that reach the sink cheaper by sending to `node`
+			candidates = distance + weights[node]
+			for sender in np.flatnonzero(candidates < cost):
+				cost[sender] = candidates[sender]
+				next_hop[sender] = node
+				heapq.heappush(heap, (cost[sender], sender))
+
+	def _repair(self, cost, next_hop, increased, decreased):
+		"""Repair a tree after the weights of the links `increased` and `decreased` changed."""
+		heap = []
+
+		#the routes through a link that became more expensive are discarded, with the routes through them
+		rx, tx = increased
+		broken = tx[next_hop[tx] == rx]
+		if len(broken):
+			affected = np.zeros(self.nr_sensors, dtype = bool)
+			affected[broken] = True
+			while True:
+				grown = affected | ((next_hop >= 0) & affected[next_hop])
+				if np.array_equal(grown, affected):
+					break
+				affected = grown
+			cost[affected] = np.inf
+			next_hop[affected] = -1
+
+			#the discarded sensors restart from their best neighbor outside the discarded subtrees
+			index = np.flatnonzero(affected)
+			candidates = self.weights[:, index] + cost[:, None]
+			best = np.argmin(candidates, axis = 0)
+			best_cost = candidates[best, np.arange(len(index))]
+			for sensor, hop, sensor_cost in zip(index, best, best_cost):
+				if sensor_cost < np.inf:
+					cost[sensor] = sensor_cost
+					next_hop[sensor] = hop
+					heap.append((sensor_cost, sensor))
+
+		#the links that became cheaper may shorten the routes of their transmitters
+		rx, tx = decreased
+		for receiver, sender in zip(rx, tx):
+			candidate = cost[receiver] + self.weights[receiver, sender]
+			if candidate < cost[sender]:
+				cost[sender] = candidate
+				next_hop[sender] = receiver
+				heap.append((candidate, sender))
+
+		heapq.heapify(heap)
+		self._search(cost, next_hop, heap)
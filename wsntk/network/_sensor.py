@@ -6,27 +6,74 @@
 
 """Sensor nodes for wirelesss sensor networks simulation."""
 from wsntk.models import NoConsumption, ExponentialConsumption
+from wsntk.network import SensorState
+from wsntk.network._state import state_property
 
 from abc import ABCMeta, abstractmethod
-from numpy.random import rand
+import numpy as np
 
 RADIO_CONFIG = {"DEFAULT":          {"min_tx_power": -15.0, "max_tx_power": 27.0, "rx_sensitivity": -80.0, "frequency": 933e6},
                 "ESP32-WROOM-32U":  {"min_tx_power": -12.0, "max_tx_power": 9.0, "rx_sensitivity": -97.0, "frequency": 2.4e9}}
 
+RADIO_PARAMS = ("min_tx_power", "max_tx_power", "rx_sensitivity", "frequency")
+
 SENSOR_MAX_ENERGY = 100
 SENSOR_MIN_ENERGY = 0.1
 
+def register_radio(radio_type, min_tx_power, max_tx_power, rx_sensitivity, frequency):
+	"""
+	Register the parameters of a radio, which can then be used by sensors and networks
+	
+	Parameters
+	----------
+	radio_type : {string}
+		The name of the radio, case insensitive. A registered radio is replaced
+	
+	min_tx_power, max_tx_power : {double}
+		The minimum and maximum transmission power [dBm]
+	
+	rx_sensitivity : {double}
+		The receiver sensitivity [dBm]
+	
+	frequency : {double}
+		The frequency of operation [Hz]
+	
+	Returns
+	-------
+	No data returned
+	"""
+	if min_tx_power > max_tx_power:
+		raise ValueError("The minimum transmission power %s is above the maximum %s." % (min_tx_power, max_tx_power))
+	if frequency <= 0:
+		raise ValueError("The frequency %s is not supported. " % frequency)
+	
+	RADIO_CONFIG[str(radio_type).upper()] = {"min_tx_power": float(min_tx_power), "max_tx_power": float(max_tx_power), 
+		"rx_sensitivity": float(rx_sensitivity), "frequency": float(frequency)}
+
 class BaseNode(metaclass=ABCMeta):
-	"""Base class for sensor node."""
+	"""
+	Base class for sensor node.
+	
+	The node state is kept in one row of a ``SensorState``. A node created alone owns a single-row state, 
+	while the nodes of a network are views onto the rows of the state owned by the network.
+	"""
+
+	__slots__ = ("dimensions", "_state", "_index")
+
+	position = state_property("positions", "The position of the sensor, a view onto its row of the state.")
 
-	def __init__(self, dimensions):
+	def __init__(self, dimensions, state = None, index = 0, rng = None):
 		
 		self.dimensions = dimensions
-		self._init_node()
+		if state is None:
+			state = SensorState(1, len(dimensions))
+		self._state = state
+		self._index = index
+		self._init_node(np.random if rng is None else rng)
 
-	def _init_node(self):
-		ndim = len(self.dimensions)
-		self.position = rand(ndim) * self.dimensions
+	def _init_node(self, rng):
+		#one position per replica when the state has a replica axis
+		self.position = rng.random(self.position.shape) * self.dimensions
 
 	def set_position(self, position):
 		"""
@@ -65,13 +112,10 @@ class BaseNode(metaclass=ABCMeta):
 		Tuple of Double
 		   The current x and y position of the sensor
 		"""
-		return self.position
+		return tuple(self.position)
 
 	def _update_position(self):
-		""" Update the sensor position based on mobility models """
-		#ndim = len(self.position)
-		#step = 0.1*rand(ndim)
-		#self.position = self.position + step
+		""" Update the sensor position based on mobility models. The sensors of a network are moved all at once by the network. """
 		return self.position
 
 	@abstractmethod
@@ -103,16 +147,37 @@ class SensorNode(BaseNode):
 		Double, a hardware-dependent and battery-dependent proportionality constant that converts transmition power into consumed energy.
 			
 			units of energy = tx_power*scaling  
+	
+	Optional arguments:
+	
+		*state*
+		SensorState, the columnar state holding the sensor. A new single-row state is created when omitted.
+		
+		*index*
+		Integer, the row of the sensor in `state`.
+		
+		*rng*
+		numpy.random.Generator, the random generator used to place the sensor. The global numpy generator is used when omitted.
 	"""
 	
+	__slots__ = ("cons_model",)
+	
 	consumption_models = {
 		"None": (NoConsumption,),
 		"Exponential": (ExponentialConsumption,),
 	}
 	
-	def __init__(self, dimensions, radio = "DEFAULT", consumption = "None", scaling = 1.0):
+	tx_power = state_property("tx_power")
+	min_tx_power = state_property("min_tx_power")
+	max_tx_power = state_property("max_tx_power")
+	rx_sensitivity = state_property("rx_sensitivity")
+	frequency = state_property("frequency")
+	residual = state_property("residual")
+	activity = state_property("activity")
+	
+	def __init__(self, dimensions, radio = "DEFAULT", consumption = "None", scaling = 1.0, state = None, index = 0, rng = None):
 		
-		super(SensorNode, self).__init__(dimensions)
+		super(SensorNode, self).__init__(dimensions, state, index, rng)
 		#initialize radio configuration
 		self._set_radio_config(radio)
 		#initialize consumption model
@@ -125,26 +190,48 @@ class SensorNode(BaseNode):
 	def _set_radio_config(self, radio_type):
 		""" Collect the radio parameters used in the sensor """
 
-		radio_params = self._get_radio_params(radio_type)
-		for param in radio_params: 
-			if param == "max_tx_power":
-			   self.max_tx_power = radio_params[param]
-			elif param == "min_tx_power":
-			   self.min_tx_power = radio_params[param]
-			elif param == "rx_sensitivity":
-			   self.rx_sensitivity = radio_params[param]
-			elif param == "frequency":
-			   self.frequency = radio_params[param]
-			else:
-				raise ValueError("Radio parameter not expected: %s." %(param))
+		for param, value in self._get_radio_arrays(radio_type).items():
+			setattr(self, param, value)
 		
 		#initialize radio with maximun tx_power                    
 		self.tx_power = self.max_tx_power        
 
-	def _set_consumption(self, consumption, scaling):
+	@classmethod
+	def view(cls, dimensions, state, index, cons_model):
+		"""
+		Create a sensor as a view onto a row of a state that is already initialized
+		
+		Parameters
+		----------
+		dimensions : {tuple of double}
+			The dimensions of the simulation area
+		
+		state : {SensorState}
+			The state holding the sensor
+		
+		index : {integer}
+			The row of the sensor in `state`
+		
+		cons_model : {BaseConsumptionModel}
+			The consumption model of the sensor
+		
+		Returns
+		-------
+		SensorNode
+			The sensor, without drawing its position nor resetting its radio and energy
+		"""
+		sensor = cls.__new__(cls)
+		sensor.dimensions = dimensions
+		sensor._state = state
+		sensor._index = index
+		sensor.cons_model = cons_model
+		return sensor
+	
+	@classmethod
+	def _set_consumption(cls, consumption, scaling):
 		"""Set ``Consumption Class`` object for str ``consumption``. """
 		try:
-			model_ = self.consumption_models[consumption]
+			model_ = cls.consumption_models[consumption]
 			model_class, args = model_[0], model_[1:]
 			if consumption in ('Exponential'):
 				args = (scaling,)
@@ -152,7 +239,8 @@ class SensorNode(BaseNode):
 		except KeyError as e:
 			raise ValueError("The consumption model %s is not supported. " % consumption) from e
 			
-	def _get_radio_params(self, radio_type):
+	@classmethod
+	def _get_radio_params(cls, radio_type):
 		""" Retrieve the radio parameters based on specified type """
 		radio_type = str(radio_type).upper()
 		try:
@@ -160,6 +248,33 @@ class SensorNode(BaseNode):
 		except KeyError as e:
 			raise ValueError("Radio %s is not supported." % radio_type) from e
 
+	@classmethod
+	def _get_radio_arrays(cls, radio_types):
+		"""
+		Retrieve the radio parameters of a list of sensors as arrays
+		
+		Parameters
+		----------
+		radio_types : {string or sequence of strings}
+			The radio type of all sensors, or of each sensor
+		
+		Returns
+		-------
+		dict
+			The array of each radio parameter, with one value per sensor, or a single value for all sensors
+		"""
+		if isinstance(radio_types, str):
+			names, inverse = [radio_types], 0
+		else:
+			#each radio type is looked up once and its parameters are scattered to its sensors
+			names, inverse = np.unique(np.char.upper(np.asarray(radio_types, dtype = str)), return_inverse = True)
+		table = [cls._get_radio_params(name) for name in names]
+		for radio_params in table:
+			for param in radio_params:
+				if param not in RADIO_PARAMS:
+					raise ValueError("Radio parameter not expected: %s." %(param))
+		return {param: np.array([radio_params[param] for radio_params in table], dtype = float)[inverse] for param in RADIO_PARAMS}
+
 	def _update_energy(self):
 		""" Update the sensor energy based on consumption models """
 		
@@ -190,7 +305,7 @@ class SensorNode(BaseNode):
 		No data returned
 		"""
 		
-		if((tx_power >= self.min_tx_power) and (tx_power <= self.max_tx_power)):
+		if(np.all(tx_power >= self.min_tx_power) and np.all(tx_power <= self.max_tx_power)):
 			self.tx_power = tx_power    
 		else:
 			raise ValueError("Parameter out of radio power specification. Expected value from %s dBm to %s dBm." %(self.min_tx_power, self.max_tx_power))
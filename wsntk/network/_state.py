@@ -0,0 +1,146 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""Columnar state of the sensor nodes of a network."""
+
+import numpy as np
+
+def state_property(column, doc = None):
+	"""
+	Create a property that reads and writes one row of a ``SensorState`` column.
+
+	The owner class must provide the ``_state`` and ``_index`` attributes. Writing a tracked
+	column marks the row as dirty.
+
+	Parameters
+	----------
+	column : string
+	   The name of the ``SensorState`` column.
+
+	doc: string
+		The property documentation.
+
+	Returns
+	-------
+	property
+		A property bound to the row ``_index`` of `column`.
+	"""
+	def fget(self):
+		return getattr(self._state, column)[self._state.row(self._index)]
+
+	def fset(self, value):
+		getattr(self._state, column)[self._state.row(self._index)] = value
+		if column in self._state.tracked:
+			self._state.dirty[self._index] = True
+
+	return property(fget, fset, doc = doc)
+
+class SensorState(object):
+	"""
+	Sensor state class.
+	This class keeps the state of a set of sensors as contiguous arrays, one row per sensor.
+	Sensor nodes are lightweight views onto one row of the state, while the network updates all rows at once.
+	
+	The rows whose position or radio settings changed since the last links update are flagged in `dirty`, 
+	so the links of the other sensors can be reused. Code writing the columns directly must call ``touch``.
+
+	With `replicas`, every column carries a leading replica axis, (R, N) or (R, N, ndim), and a row
+	addresses the same sensor in all replicas. The dirty flags are shared by all replicas.
+
+	The positions, radio powers and residual energy are stored with type `dtype`. The frequencies are 
+	always stored in double precision, so the reference losses of each radio do not depend on it.
+
+	Required arguments:
+
+		*nr_sensors*:
+			Integer, the number of sensors.
+
+		*ndim*:
+			Integer, the number of spatial dimensions.
+
+	Optional arguments:
+
+		*replicas*:
+			Integer, the number of replicas.
+
+		*dtype*:
+			Data type of the floating point columns, np.float64 (default) or np.float32.
+	"""
+
+	columns = ("positions", "tx_power", "min_tx_power", "max_tx_power", "rx_sensitivity", "frequency", "residual", "activity")
+	
+	#columns that affect the links of a sensor
+	tracked = ("positions", "tx_power", "rx_sensitivity", "frequency")
+
+	def __init__(self, nr_sensors, ndim, replicas = None, dtype = np.float64):
+
+		self.replicas = replicas
+		self.dtype = np.dtype(dtype)
+		shape = (nr_sensors,) if replicas is None else (replicas, nr_sensors)
+		
+		self.positions = np.zeros(shape + (ndim,), dtype = self.dtype)
+		self.tx_power = np.zeros(shape, dtype = self.dtype)
+		self.min_tx_power = np.zeros(shape, dtype = self.dtype)
+		self.max_tx_power = np.zeros(shape, dtype = self.dtype)
+		self.rx_sensitivity = np.zeros(shape, dtype = self.dtype)
+		self.frequency = np.zeros(shape)
+		self.residual = np.zeros(shape, dtype = self.dtype)
+		self.activity = np.zeros(shape, dtype = int)
+		self.dirty = np.ones(nr_sensors, dtype = bool)
+
+	def __len__(self):
+		return len(self.dirty)
+
+	def row(self, index):
+		"""
+		Get the key that selects a sensor in every column
+
+		Parameters
+		----------
+		index : {integer}
+			The row of the sensor
+
+		Returns
+		-------
+		integer or tuple
+			`index` itself, or a key selecting `index` in all replicas
+		"""
+		if self.replicas is None:
+			return index
+		return (slice(None), index)
+
+	def touch(self, index):
+		"""
+		Flag sensors whose position or radio settings changed
+
+		Parameters
+		----------
+		index : {integer, array of integers or boolean mask}
+			The rows of the changed sensors
+
+		Returns
+		-------
+		No data returned
+		"""
+		self.dirty[index] = True
+
+	def clean(self):
+		"""
+		Get and clear the flagged sensors
+
+		Parameters
+		----------
+		No parameters
+
+		Returns
+		-------
+		ndarray
+			The rows flagged since the last call
+		"""
+		index = np.flatnonzero(self.dirty)
+		self.dirty[index] = False
+		return index
+
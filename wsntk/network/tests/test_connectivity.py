@@ -0,0 +1,70 @@
+# Author: Edielson P. Frigieri <edielsonpf@gmail.com>
+#
+# License: MIT
+
+import pytest
+import numpy as np
+
+from wsntk.network import Connectivity, SensorNetwork
+
+def _components(status):
+	# Label the components of the undirected graph by a depth first search.
+	adjacency = np.asarray(status, dtype = bool)
+	adjacency = adjacency | adjacency.T
+	labels = np.full(len(adjacency), -1)
+	for start in range(len(adjacency)):
+		if labels[start] < 0:
+			stack = [start]
+			labels[start] = start
+			while stack:
+				for neighbor in np.flatnonzero(adjacency[stack.pop()]):
+					if labels[neighbor] < 0:
+						labels[neighbor] = start
+						stack.append(neighbor)
+	return labels, adjacency.sum(axis = 1)
+
+def test_connectivity_merges_and_splits():
+	# Test that components merge when links come up and split when they go down.
+	
+	connectivity = Connectivity(5)
+	status = np.zeros((5, 5), dtype = int)
+	status[1, 0] = status[3, 4] = 1
+	metrics = connectivity.update(status, np.ones(5))
+	assert metrics["labels"].tolist() == [0, 0, 2, 3, 3]
+	assert metrics["components"] == 3 and metrics["partitioned"]
+	assert metrics["isolated"].tolist() == [False, False, True, False, False]
+	
+	status[2, 1] = status[4, 2] = 1
+	metrics = connectivity.update(status, np.ones(5))
+	assert metrics["labels"].tolist() == [0]*5
+	assert metrics["degree"].tolist() == [1, 2, 2, 1, 2]
+	assert not metrics["partitioned"] and connectivity.recomputes == 0
+	
+	status[2, 1] = 0
+	metrics = connectivity.update(status, np.array([1, 1, 0, 1, 1]))
+	assert metrics["labels"].tolist() == [0, 0, 2, 2, 2]
+	assert metrics["components"] == 2 and connectivity.recomputes == 1
+
+@pytest.mark.parametrize("engine", ["loop", "matrix", "sparse"])
+def test_network_connectivity_matches_search(engine):
+	# Test the metrics yielded by a moving network against a full search.
+	
+	net = SensorNetwork(25, (200, 200), loss = "LDPL", n0 = 3.5, radio = "ESP32-WROOM-32U", engine = engine, seed = 2, mobility = "RandomWalk", speed = 20.0, connectivity = True)
+	for step, (_, _, activities, status, _, metrics) in zip(range(10), net):
+		if engine == "sparse":
+			(data, (rx, tx)) = status
+			status = np.zeros((25, 25), dtype = int)
+			status[rx, tx] = data
+		labels, degree = _components(status)
+		
+		assert np.array_equal(metrics["labels"], labels)
+		assert np.array_equal(metrics["degree"], degree)
+		assert metrics["components"] == len(np.unique(labels[np.asarray(activities, dtype = bool)]))
+	
+	assert net.connectivity.recomputes > 0
+
+def test_connectivity_rejects_replicas():
+	# Test that the metrics are not maintained for replicas.
+	
+	with pytest.raises(ValueError, match='Connectivity metrics are not supported with replicas.'):
+		SensorNetwork(5, (100, 100), engine = "matrix", replicas = 2, connectivity = True)
@@ -0,0 +1,58 @@
+# Author: Edielson P. Frigieri <edielsonpf@gmail.com>
+#
+# License: MIT
+
+import pytest
+import numpy as np
+
+from wsntk import network
+from wsntk.network import GridIndex
+
+def test_grid_index_matches_brute_force():
+	# Test the neighbor pairs against all pairs of sensors.
+
+	np.random.seed(0xffff)
+	positions = np.random.rand(200, 2)*100
+	
+	index = GridIndex(radius = 12.5)
+	assert index.update(positions)
+	rx, tx, distance = index.pairs()
+	
+	delta = positions[:, None, :] - positions[None, :, :]
+	expected = np.sqrt(np.sum(delta**2, axis = -1))
+	np.fill_diagonal(expected, np.inf)
+	expected_rx, expected_tx = np.nonzero(expected <= 12.5)
+	
+	assert np.array_equal(rx, expected_rx)
+	assert np.array_equal(tx, expected_tx)
+	assert np.array_equal(distance, expected[rx, tx])
+
+def test_grid_index_three_dimensions():
+	# Test the neighbor pairs of sensors in a volume.
+
+	np.random.seed(0xffff)
+	positions = np.random.rand(100, 3)*10
+	
+	index = GridIndex(radius = 3.0)
+	index.update(positions)
+	rx, tx, distance = index.pairs()
+	
+	delta = positions[:, None, :] - positions[None, :, :]
+	expected = np.sqrt(np.sum(delta**2, axis = -1))
+	np.fill_diagonal(expected, np.inf)
+	
+	assert len(rx) == np.sum(expected <= 3.0)
+
+def test_grid_index_is_only_rebuilt_when_positions_change():
+	# Test that the index is kept for static sensors.
+
+	positions = np.array([[0.0, 0.0], [1.0, 0.0], [5.0, 0.0]])
+	
+	index = GridIndex(radius = 2.0)
+	assert index.update(positions)
+	assert not index.update(positions.copy())
+	
+	positions[2, 0] = 2.5
+	assert index.update(positions)
+	rx, tx, _ = index.pairs()
+	assert list(zip(rx, tx)) == [(0, 1), (1, 0), (1, 2), (2, 1)]
@@ -0,0 +1,80 @@
+# Author: Edielson P. Frigieri <edielsonpf@gmail.com>
+#
+# License: MIT
+
+import pytest
+import numpy as np
+
+from wsntk.network import SensorNetwork
+
+def _equal(value, expected):
+	# Compare outputs, including the (data, (rx, tx)) triplets of the sparse engine.
+	if isinstance(value, tuple):
+		return all(_equal(item, expected_item) for item, expected_item in zip(value, expected))
+	return np.array_equal(value, expected)
+
+@pytest.mark.parametrize("engine", ["loop", "matrix", "sparse"])
+def test_instrumentation_does_not_change_outputs(engine):
+	# Test that instrumented steps give the same outputs and count the links and draws.
+	
+	params = dict(loss = "LDPL", sigma = 4.0, radio = "ESP32-WROOM-32U", engine = engine, seed = 3)
+	plain = iter(SensorNetwork(12, (100, 100), **params))
+	net = SensorNetwork(12, (100, 100), **params)
+	
+	steps = []
+	instrumentation = net.instrument(lambda step, timers, counters: steps.append((step, counters)))
+	for _, outputs, expected in zip(range(3), net, plain):
+		for value, expected_value in zip(outputs, expected):
+			assert _equal(value, expected_value)
+	
+	assert [step for step, _ in steps] == [1, 2, 3]
+	for _, counters in steps:
+		assert counters["links_evaluated"] + counters["links_skipped"] == 12*11
+		assert counters["rng_draws"] == counters["links_evaluated"]
+	
+	summary = instrumentation.summary()
+	assert summary["steps"] == 3
+	assert {"sensors", "links", "output", "rng"} <= set(summary["timers"])
+	assert summary["memory"]["sensors"] > 0 and summary["memory"]["links"] > 0
+	assert "links_evaluated" in instrumentation.report()
+	
+	assert net.uninstrument() is instrumentation
+	next(iter(net))
+	assert instrumentation.steps == 3
+	assert all(not hasattr(holder.rng, "instrumentation") for holder in net._rng_holders())
+
+def test_matrix_engine_counts_changed_links():
+	# Test that a deterministic matrix engine only evaluates the links of changed sensors.
+	
+	net = SensorNetwork(10, (100, 100), engine = "matrix", seed = 3)
+	instrumentation = net.instrument()
+	counters = []
+	instrumentation.add_listener(lambda step, timers, step_counters: counters.append(step_counters))
+	
+	next(iter(net))
+	net.sensors[4].tx_power = 0.0
+	next(iter(net))
+	next(iter(net))
+	
+	assert [step["links_evaluated"] for step in counters] == [90, 18, 0]
+	assert "rng_draws" not in counters[0]
+
+def test_advance_and_fast_forward_are_instrumented():
+	# Test that the steps run by advance and fast_forward are timed and counted like the steps of the iterator.
+	
+	net = SensorNetwork(10, (100, 100), loss = "LDPL", sigma = 4.0, consumption = "Exponential", scaling = 1.0, engine = "matrix", seed = 3)
+	instrumentation = net.instrument()
+	steps = []
+	instrumentation.add_listener(lambda step, timers, counters: steps.append((step, timers, counters)))
+	
+	net.advance(3, record = "residuals")
+	net.advance(2)
+	skipped, _ = net.fast_forward(max_steps = 4)
+	
+	assert [step for step, _, _ in steps] == [1, 2, 3, 4, 5, 6]
+	for _, timers, counters in steps:
+		assert {"sensors", "links"} <= set(timers)
+		assert counters["rng_draws"] == counters["links_evaluated"] == 90
+	assert "output" in steps[0][1] and "output" in steps[4][1]
+	assert skipped == 4 and steps[-1][2]["steps_skipped"] == 3
+	assert instrumentation.summary()["memory"]["links"] > 0
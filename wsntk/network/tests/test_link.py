@@ -6,7 +6,7 @@ import pytest
 import numpy as np
 
 from wsntk import network
-from wsntk.network import RadioLink
+from wsntk.network import RadioLink, RadioLinkMatrix
 
 
 
@@ -154,4 +154,66 @@ def test_radio_link_set_frequency():
 	loss,status = next(link)
 	#the loss is bigger with a diffetent frequency and the link becomes down
 	assert round(loss,2) == 52.09
-	assert status == 0	
\ No newline at end of file
+	assert status == 0	
+
+
+def test_radio_link_matrix():
+	# Test RadioLinkMatrix against one RadioLink per pair of sensors.
+
+	distance = np.array([[0, 1, 4], [1, 0, 15], [4, 15, 0]])
+	tx_power = np.array([0, 0, 27])
+	rx_sensitivity = np.array([-50, -50, -80])
+	frequency = np.array([2.4e9, 2.4e9, 933e6])
+	
+	links = RadioLinkMatrix(tx_power, rx_sensitivity, distance, frequency, activity = np.ones(3), loss = "TSPL", n0 = 2.2, n1 = 3.3)
+	loss, status = next(iter(links))
+	
+	for rx in range(3):
+		for tx in range(3):
+			if rx != tx:
+				link = RadioLink(tx_power[tx], rx_sensitivity[rx], distance[rx, tx], frequency[tx], loss = "TSPL", n0 = 2.2, n1 = 3.3)
+				expected_loss, expected_status = next(iter(link))
+				assert loss[rx, tx] == expected_loss
+				assert status[rx, tx] == expected_status
+			else:
+				assert loss[rx, tx] == 0
+				assert status[rx, tx] == 0
+
+
+def test_radio_link_shared_model():
+	# Test that links given a propagation model share it and have no attribute dictionary.
+
+	model = RadioLink._init_link("LDPL", 1.0, 10.0, 0.0, 2.2, 3.3)
+	links = [RadioLink(0, -50, distance, 2.4e9, model = model) for distance in (1, 4, 15)]
+	
+	for link, distance in zip(links, (1, 4, 15)):
+		assert link.model is model
+		assert not hasattr(link, "__dict__")
+		#the shared model gives the same losses as a model of its own
+		expected = RadioLink(0, -50, distance, 2.4e9, loss = "LDPL", n0 = 2.2)
+		assert next(iter(link)) == next(iter(expected))
+	
+	with pytest.raises(AttributeError):
+		links[0].gain = 1.0
+
+
+def test_radio_link_caches_loss_without_shadowing():
+	# Test that a link only recalculates its loss without shadowing when its distance or frequency changes.
+
+	rng = np.random.default_rng(1)
+	link = RadioLink(0, -50, 4, 2.4e9, loss = "LDPL", n0 = 2.2, rng = rng)
+	state = rng.bit_generator.state
+	loss, _ = next(iter(link))
+	assert next(iter(link))[0] == loss
+	#a deterministic model does not draw shadowing
+	assert rng.bit_generator.state == state
+	
+	link.set_distance(15)
+	assert next(iter(link)) == next(iter(RadioLink(0, -50, 15, 2.4e9, loss = "LDPL", n0 = 2.2)))
+	link.set_frequency(933e6)
+	assert next(iter(link)) == next(iter(RadioLink(0, -50, 15, 933e6, loss = "LDPL", n0 = 2.2)))
+	
+	#the shadowing is drawn again on every update
+	link = RadioLink(0, -50, 4, 2.4e9, loss = "LDPL", sigma = 8.7, rng = np.random.default_rng(1))
+	expected = RadioLink(0, -50, 4, 2.4e9, loss = "LDPL", sigma = 8.7).model.mean_loss(4, 2.4e9) + np.random.default_rng(1).normal(0, 8.7, 2)
+	assert [next(iter(link))[0] for _ in range(2)] == list(expected)
@@ -3,10 +3,560 @@
 # License: MIT
 
 import pytest
+import tracemalloc
+import numpy as np
 
 from wsntk import network
-from wsntk.network import SensorNetwork
+from wsntk.network import SensorNetwork, SensorNode
+from wsntk.models import NoMobility, LogDistance
 
 def test_network():
     pass
 
+
+def test_network_with_unknown_engine_raises_value_error():
+    # Test SensorNetwork creation with an unknown link engine.
+    
+    error_msg = ('The link engine UNKNOWN is not supported.')
+    
+    with pytest.raises(ValueError, match=error_msg):
+        SensorNetwork(5, dimensions = (100, 100), engine = "UNKNOWN")
+
+def test_matrix_engine_matches_loop_engine():
+    # Test that both link engines produce the same links for the same seed.
+    
+    np.random.seed(0xffff)
+    net = iter(SensorNetwork(8, dimensions = (100, 100), loss = "LDPL", sigma = 8.7, n0 = 2.2, engine = "loop"))
+    _, _, _, status, loss = next(net)
+    
+    np.random.seed(0xffff)
+    net = iter(SensorNetwork(8, dimensions = (100, 100), loss = "LDPL", sigma = 8.7, n0 = 2.2, engine = "matrix"))
+    _, _, _, status_matrix, loss_matrix = next(net)
+    
+    assert isinstance(loss_matrix, np.ndarray)
+    assert status_matrix.shape == (8, 8)
+    assert np.array_equal(status_matrix, status)
+    assert np.array_equal(loss_matrix, loss)
+
+@pytest.mark.parametrize("engine", ["loop", "matrix", "sparse"])
+def test_network_without_sensors(engine):
+    # Test that every link engine steps a network without sensors.
+    
+    _, residuals, activities, status, loss = next(iter(SensorNetwork(0, dimensions = (100, 100), engine = engine, seed = 1)))
+    
+    assert len(residuals) == 0 and len(activities) == 0
+    if engine == "matrix":
+        assert status.shape == (0, 0) and loss.shape == (0, 0)
+
+def test_matrix_engine_skips_inactive_sensors():
+    # Test that links of an inactive sensor are down.
+    
+    net = SensorNetwork(4, dimensions = (10, 10), loss = "FSPL", engine = "matrix")
+    net.sensors[1].residual = 0
+    _, _, activities, status, loss = next(iter(net))
+    
+    assert activities[1] == 0
+    assert not status[1].any() and not status[:, 1].any()
+    assert not loss[1].any() and not loss[:, 1].any()
+    assert np.diag(status).sum() == 0
+
+def test_network_sensors_share_state():
+    # Test that the network sensors are views onto the network state.
+    
+    net = SensorNetwork(5, dimensions = (100, 100), consumption = "Exponential", scaling = 1.0)
+    positions, residuals, activities, _, _ = next(iter(net))
+    
+    assert net.state.positions.shape == (5, 2)
+    assert np.array_equal(positions, [sensor.get_position() for sensor in net.sensors])
+    assert residuals == [sensor.residual for sensor in net.sensors]
+    assert residuals[0] < 100
+    
+    net.sensors[2].set_txpower(0.0)
+    assert net.state.tx_power[2] == 0.0
+
+def test_sparse_engine_matches_matrix_engine():
+    # Test that the sparse engine finds every link of the matrix engine without shadowing.
+    
+    np.random.seed(0xffff)
+    net = iter(SensorNetwork(60, dimensions = (1000, 1000), loss = "LDPL", n0 = 3.0, radio = "ESP32-WROOM-32U", engine = "matrix"))
+    _, _, _, status, loss = next(net)
+    
+    np.random.seed(0xffff)
+    net = SensorNetwork(60, dimensions = (1000, 1000), loss = "LDPL", n0 = 3.0, radio = "ESP32-WROOM-32U", engine = "sparse")
+    _, _, _, (status_data, (rx, tx)), (loss_data, _) = next(iter(net))
+    
+    assert len(rx) < 60*59
+    assert status_data.sum() == status.sum()
+    assert np.array_equal(status_data, status[rx, tx])
+    assert np.array_equal(loss_data, loss[rx, tx])
+
+def _run_with_changes(engine, sigma):
+    # Run a few steps changing the position, the radio and the activity of some sensors.
+    
+    np.random.seed(0xffff)
+    net = SensorNetwork(10, dimensions = (100, 100), loss = "TSPL", sigma = sigma, n0 = 2.2, n1 = 3.3, radio = "ESP32-WROOM-32U", engine = engine)
+    steps = iter(net)
+    outputs = [next(steps)]
+    
+    net.sensors[3].set_txpower(-12.0)
+    outputs.append(next(steps))
+    net.sensors[5].set_position((50.0, 50.0))
+    outputs.append(next(steps))
+    net.sensors[7].residual = 0
+    outputs.append(next(steps))
+    outputs.append(next(steps))
+    
+    return [(np.asarray(status), np.asarray(loss)) for _, _, _, status, loss in outputs]
+
+def test_matrix_engine_only_updates_changed_links():
+    # Test the cached matrix engine against the loop engine when sensors change.
+    
+    for sigma in (0.0, 8.7):
+        for (status, loss), (status_matrix, loss_matrix) in zip(_run_with_changes("loop", sigma), _run_with_changes("matrix", sigma)):
+            assert np.array_equal(status_matrix, status)
+            assert np.array_equal(loss_matrix, loss)
+
+def test_sensor_changes_flag_state_rows():
+    # Test that changing the position or the radio of a sensor flags its row.
+    
+    net = SensorNetwork(4, dimensions = (100, 100), engine = "matrix")
+    next(iter(net))
+    assert not net.state.dirty.any()
+    
+    net.sensors[1].set_txpower(0.0)
+    net.sensors[2].set_position((1.0, 1.0))
+    assert list(net.state.clean()) == [1, 2]
+    assert not net.state.dirty.any()
+
+def test_seeded_networks_do_not_interfere():
+    # Test that networks with their own seed are reproducible when stepped together.
+    
+    state = np.random.get_state()
+    alone = [next(iter(SensorNetwork(6, dimensions = (100, 100), loss = "LDPL", sigma = 8.7, seed = seed, engine = "matrix"))) for seed in (1, 2)]
+    
+    first = iter(SensorNetwork(6, dimensions = (100, 100), loss = "LDPL", sigma = 8.7, seed = 1, engine = "matrix"))
+    second = iter(SensorNetwork(6, dimensions = (100, 100), loss = "LDPL", sigma = 8.7, seed = 2, engine = "matrix"))
+    together = [next(first), next(second)]
+    
+    for expected, output in zip(alone, together):
+        for a, b in zip(expected, output):
+            assert np.array_equal(a, b)
+    #the global generator is not used
+    assert np.array_equal(np.random.get_state()[1], state[1])
+
+def test_seeded_engines_match():
+    # Test that the loop and the matrix engines draw the same shadowing from the same seed.
+    
+    _, _, _, status, loss = next(iter(SensorNetwork(8, dimensions = (100, 100), loss = "TSPL", sigma = 8.7, seed = 0xffff, engine = "loop")))
+    _, _, _, status_matrix, loss_matrix = next(iter(SensorNetwork(8, dimensions = (100, 100), loss = "TSPL", sigma = 8.7, seed = 0xffff, engine = "matrix")))
+    
+    assert np.array_equal(status_matrix, status)
+    assert np.array_equal(loss_matrix, loss)
+
+def test_replicas_require_matrix_engine():
+    # Test that replicas are rejected by the loop engine.
+    
+    error_msg = ('Replicas are only supported by the matrix engine.')
+    
+    with pytest.raises(ValueError, match=error_msg):
+        SensorNetwork(5, dimensions = (100, 100), replicas = 3)
+
+def test_replicas_match_single_networks():
+    # Test that each replica evolves as a single network with the same deployment.
+    
+    net = SensorNetwork(6, dimensions = (100, 100), loss = "LDPL", n0 = 3.0, radio = "ESP32-WROOM-32U", engine = "matrix", seed = 1, replicas = 3)
+    positions, residuals, activities, status, loss = next(iter(net))
+    
+    assert positions.shape == (3, 6, 2)
+    assert residuals.shape == activities.shape == (3, 6)
+    assert status.shape == loss.shape == (3, 6, 6)
+    assert not np.array_equal(positions[0], positions[1])
+    
+    for replica in range(3):
+        single = SensorNetwork(6, dimensions = (100, 100), loss = "LDPL", n0 = 3.0, radio = "ESP32-WROOM-32U", engine = "matrix", seed = 2)
+        single.state.positions[:] = positions[replica]
+        single.state.touch(slice(None))
+        _, _, _, single_status, single_loss = next(iter(single))
+        
+        assert np.array_equal(status[replica], single_status)
+        assert np.array_equal(loss[replica], single_loss)
+
+def test_network_with_unknown_output_raises_value_error():
+    # Test that an unknown output format is rejected.
+    
+    with pytest.raises(ValueError, match='The output dict is not supported. '):
+        SensorNetwork(5, dimensions = (100, 100), output = "dict")
+    with pytest.raises(ValueError, match='The output packed is not supported by the sparse engine. '):
+        SensorNetwork(5, dimensions = (100, 100), engine = "sparse", output = "packed")
+
+@pytest.mark.parametrize("engine", ["loop", "matrix"])
+def test_array_and_packed_outputs_match_list_output(engine):
+    # Test that the array and packed outputs hold the same links as the list output.
+    
+    outputs = {}
+    for output in ("list", "array", "packed"):
+        net = SensorNetwork(20, dimensions = (100, 100), loss = "LDPL", sigma = 4.0, radio = "ESP32-WROOM-32U", engine = engine, seed = 5, output = output, loss_dtype = np.float32)
+        outputs[output] = next(iter(net))
+    
+    _, residuals, activities, status, loss = outputs["list"]
+    assert isinstance(status, list) and isinstance(residuals, list)
+    
+    _, array_residuals, array_activities, array_status, array_loss = outputs["array"]
+    assert array_status.dtype == bool and array_status.shape == (20, 20)
+    assert array_loss.dtype == np.float32
+    assert np.array_equal(array_status, status)
+    assert np.allclose(array_loss, loss, rtol = 1e-6)
+    assert np.array_equal(array_residuals, residuals)
+    
+    packed_status = outputs["packed"][3]
+    assert packed_status.dtype == np.uint8 and packed_status.shape == (20, 3)
+    assert np.array_equal(np.unpackbits(packed_status, axis = -1, count = 20).astype(bool), array_status)
+
+def test_sparse_array_output():
+    # Test that the sparse engine converts the data of its triplets.
+    
+    net = SensorNetwork(20, dimensions = (100, 100), engine = "sparse", seed = 5, output = "array", loss_dtype = np.float32)
+    _, _, _, (status, (rx, tx)), (loss, _) = next(iter(net))
+    
+    assert status.dtype == bool and loss.dtype == np.float32
+    assert len(status) == len(loss) == len(rx) == len(tx)
+
+@pytest.mark.parametrize("engine", ["loop", "matrix"])
+def test_advance_matches_iteration(engine):
+    # Test that advancing several steps gives the same outputs as iterating over the network.
+    
+    params = dict(loss = "LDPL", sigma = 4.0, radio = "ESP32-WROOM-32U", consumption = "Exponential", scaling = 50.0, engine = engine, seed = 8)
+    iterated = [step for step, _ in zip(iter(SensorNetwork(10, (100, 100), **params)), range(5))]
+    
+    records = SensorNetwork(10, (100, 100), **params).advance(5, record = ("residuals", "status", "loss"))
+    assert records["residuals"].shape == (5, 10)
+    assert records["status"].shape == records["loss"].shape == (5, 10, 10)
+    for step, (_, residuals, _, status, loss) in enumerate(iterated):
+        assert np.array_equal(records["residuals"][step], residuals)
+        assert np.array_equal(records["status"][step], status)
+        assert np.array_equal(records["loss"][step], loss)
+    
+    final = SensorNetwork(10, (100, 100), **params).advance(5)
+    for value, expected in zip(final, iterated[-1]):
+        assert np.array_equal(value, expected)
+
+def test_advance_records_packed_output():
+    # Test that the recorded fields follow the selected output.
+    
+    net = SensorNetwork(10, (100, 100), engine = "matrix", seed = 8, output = "packed", loss_dtype = np.float32)
+    records = net.advance(3, record = "status")
+    
+    assert list(records) == ["status"]
+    assert records["status"].shape == (3, 10, 2) and records["status"].dtype == np.uint8
+
+def test_advance_with_invalid_arguments_raises_value_error():
+    # Test that unknown fields and sparse links are rejected.
+    
+    with pytest.raises(ValueError, match='The field energy is not supported. '):
+        SensorNetwork(5, (100, 100)).advance(2, record = "energy")
+    with pytest.raises(ValueError, match='The field status is sparse'):
+        SensorNetwork(5, (100, 100), engine = "sparse").advance(2, record = "status")
+    with pytest.raises(ValueError, match='The number of steps must be at least 1.'):
+        SensorNetwork(5, (100, 100)).advance(0)
+
+def test_fast_forward_matches_stepping():
+    # Test that fast forwarding reaches the first death at the same step as iterating.
+    
+    params = dict(radio = "ESP32-WROOM-32U", consumption = "Exponential", scaling = 5.0, engine = "matrix", seed = 3)
+    net = SensorNetwork(10, (100, 100), **params)
+    net.state.tx_power[:] = np.linspace(10, 20, 10)
+    
+    expected = 0
+    for expected, (_, residuals, activities, status, loss) in enumerate(iter(net), 1):
+        if not np.all(activities):
+            break
+    
+    net = SensorNetwork(10, (100, 100), **params)
+    net.state.tx_power[:] = np.linspace(10, 20, 10)
+    steps, (_, fast_residuals, fast_activities, fast_status, fast_loss) = net.fast_forward()
+    
+    assert steps == expected
+    assert np.array_equal(fast_activities, activities)
+    assert np.allclose(fast_residuals, residuals, rtol = 1e-9)
+    assert np.array_equal(fast_status, status)
+    assert np.array_equal(fast_loss, loss)
+
+def test_fast_forward_without_consumption_requires_max_steps():
+    # Test that a network without consumption is only advanced by max_steps.
+    
+    net = SensorNetwork(5, (100, 100))
+    
+    with pytest.raises(ValueError, match='No active sensor runs out of energy, max_steps is required.'):
+        net.fast_forward()
+    assert net.fast_forward(max_steps = 10)[0] == 10
+
+@pytest.mark.parametrize("mobility", ["RandomWalk", "RandomWaypoint", "GaussMarkov"])
+def test_mobile_engines_match(mobility):
+    # Test that the engines agree on the links of moving sensors.
+    
+    outputs = {}
+    for engine in ("loop", "matrix", "sparse"):
+        net = SensorNetwork(15, (100, 100), loss = "LDPL", n0 = 3.5, radio = "ESP32-WROOM-32U", engine = engine, seed = 6, mobility = mobility, speed = 10.0)
+        outputs[engine] = [step for step, _ in zip(iter(net), range(4))]
+    
+    assert not np.array_equal(outputs["matrix"][0][0], outputs["matrix"][3][0])
+    for (positions, _, _, status, loss), (matrix_positions, _, _, matrix_status, matrix_loss), (_, _, _, (data, (rx, tx)), _) in zip(outputs["loop"], outputs["matrix"], outputs["sparse"]):
+        assert np.array_equal(positions, matrix_positions)
+        assert np.array_equal(status, matrix_status)
+        assert np.allclose(loss, matrix_loss, rtol = 1e-12)
+        assert np.array_equal(matrix_status[rx, tx], data)
+        assert np.sum(matrix_status) == np.sum(data)
+
+def test_network_with_unknown_mobility_raises_value_error():
+    # Test that an unknown mobility model is rejected.
+    
+    with pytest.raises(ValueError, match='The mobility model Teleport is not supported. '):
+        SensorNetwork(5, (100, 100), mobility = "Teleport")
+
+def test_links_are_created_on_demand():
+    # Test that link objects are only created when a pair of sensors is requested.
+    
+    net = SensorNetwork(2000, (1000, 1000), engine = "loop", seed = 1)
+    assert len(net.links) == 0
+    
+    link = net.links[3, 7]
+    assert net.links[3, 7] is link and len(net.links) == 1
+    assert np.isclose(link.distance, np.linalg.norm(net.state.positions[3] - net.state.positions[7]))
+    assert link.tx_power == net.sensors[7].tx_power
+    
+    with pytest.raises(KeyError):
+        net.links[3, 3]
+    with pytest.raises(KeyError):
+        net.links[3, 2000]
+
+def test_links_lookup_checks_valid_pairs():
+    # Test that in checks the pairs without creating links, get creates them and len only counts the links created.
+    
+    net = SensorNetwork(5, (100, 100), engine = "loop", seed = 1)
+    assert (1, 2) in net.links and len(net.links) == 0
+    assert (1, 2) not in net.links.keys()
+    assert net.links.get((2, 1)) is net.links[2, 1] and len(net.links) == 1
+    assert list(net.links.keys()) == [(2, 1)]
+    
+    for key in ((3, 3), (3, 5), (-1, 2), (1.0, 2), 3):
+        assert key not in net.links
+        assert net.links.get(key, "missing") == "missing"
+    assert len(net.links) == 1
+    
+    replicated = SensorNetwork(5, (100, 100), engine = "matrix", replicas = 3, seed = 1)
+    for lookup in (lambda: replicated.links[0, 1], lambda: (0, 1) in replicated.links, lambda: (4, 1) in replicated.links):
+        with pytest.raises(ValueError, match = 'Link objects are not supported with replicas.'):
+            lookup()
+def test_sensor_views_share_network_configuration():
+    # Test that the sensors created at once are configured as the sensors created one by one.
+    
+    net = SensorNetwork(4, (100, 100), radio = "ESP32-WROOM-32U", consumption = "Exponential", seed = 1)
+    node = SensorNode((100, 100), radio = "ESP32-WROOM-32U")
+    
+    for sensor in net.sensors:
+        assert sensor.cons_model is net.cons_model
+        for attribute in ("tx_power", "min_tx_power", "max_tx_power", "rx_sensitivity", "frequency", "residual", "activity"):
+            assert getattr(sensor, attribute) == getattr(node, attribute)
+
+@pytest.mark.parametrize("engine", ["loop", "matrix", "sparse"])
+def test_links_share_propagation_model(engine):
+    # Test that the link objects share one propagation model, the model of the link engine if there is one.
+    
+    net = SensorNetwork(5, (100, 100), loss = "LDPL", sigma = 4.0, engine = engine, seed = 1)
+    models = {id(net.links[rx, tx].model) for rx in range(5) for tx in range(5) if rx != tx}
+    assert len(models) == 1
+    
+    engine_link = net.link_matrix if engine == "matrix" else net.link_sparse
+    if engine_link is not None:
+        assert net.links[0, 1].model is engine_link.model
+    for obj in (net.sensors[0], net.links[0, 1], net.links[0, 1].model, net.cons_model, net.mob_model):
+        assert not hasattr(obj, "__dict__")
+
+def test_network_with_mixed_radios():
+    # Test that each sensor gets the parameters of its own radio and that the engines agree on the links.
+    
+    radio = ["DEFAULT", "esp32-wroom-32u"]*3
+    outputs = {}
+    for engine in ("loop", "matrix"):
+        net = SensorNetwork(6, (300, 300), loss = "LDPL", n0 = 2.2, radio = radio, engine = engine, seed = 2)
+        outputs[engine] = next(iter(net))
+    
+    for i, sensor in enumerate(net.sensors):
+        parameters = network.RADIO_CONFIG[radio[i].upper()]
+        assert sensor.tx_power == parameters["max_tx_power"]
+        for param, value in parameters.items():
+            assert getattr(sensor, param) == value
+    #the links from the stronger radios are up while the links back to them are down
+    status = outputs["matrix"][3]
+    assert np.any(status != status.T)
+    assert np.array_equal(status, outputs["loop"][3])
+    assert np.array_equal(outputs["matrix"][4], outputs["loop"][4])
+    
+    net = SensorNetwork(6, (30, 30), radio = radio, engine = "matrix", replicas = 2, seed = 2)
+    assert np.array_equal(net.state.frequency[0], net.state.frequency[1])
+    
+    with pytest.raises(ValueError, match = 'The number of radios 2 does not match the number of sensors 6.'):
+        SensorNetwork(6, (30, 30), radio = ["DEFAULT", "DEFAULT"])
+    with pytest.raises(ValueError, match = 'Radio UNKNOWN is not supported.'):
+        SensorNetwork(2, (30, 30), radio = ["DEFAULT", "unknown"])
+
+def _equal_outputs(value, expected):
+    # Compare outputs, including the (data, (rx, tx)) triplets of the sparse engine and the connectivity metrics.
+    if isinstance(value, dict):
+        return value.keys() == expected.keys() and all(_equal_outputs(value[key], expected[key]) for key in value)
+    if isinstance(value, tuple):
+        return len(value) == len(expected) and all(_equal_outputs(item, expected_item) for item, expected_item in zip(value, expected))
+    return np.array_equal(value, expected)
+
+@pytest.mark.parametrize("engine, mobility, seed", [
+    ("loop", "None", 5), 
+    ("loop", "RandomWaypoint", None), 
+    ("matrix", "GaussMarkov", 5), 
+    ("matrix", "None", None), 
+    ("sparse", "RandomWalk", 5),
+])
+def test_checkpoint_resumes_identically(tmp_path, engine, mobility, seed):
+    # Test that a network restored from a checkpoint continues exactly as the network that saved it.
+    
+    params = dict(loss = "LDPL", sigma = 4.0, radio = "ESP32-WROOM-32U", consumption = "Exponential", scaling = 20.0, 
+        engine = engine, mobility = mobility, speed = 5.0, connectivity = True, output = None if engine == "loop" else "array")
+    np.random.seed(11)
+    net = SensorNetwork(10, (100, 100), seed = seed, **params)
+    steps = iter(net)
+    for _ in range(4):
+        next(steps)
+    net.save_checkpoint(tmp_path / "checkpoint.npz")
+    expected = [next(steps) for _ in range(4)]
+    
+    np.random.seed(12)
+    restored = SensorNetwork(10, (100, 100), seed = None if seed is None else seed + 1, **params)
+    restored.load_checkpoint(tmp_path / "checkpoint.npz")
+    for expected_outputs, outputs in zip(expected, iter(restored)):
+        assert _equal_outputs(outputs, expected_outputs)
+    
+    #the placement drawn by the other seed was overwritten
+    assert np.array_equal(restored.state.positions, net.state.positions)
+
+def test_checkpoint_of_another_network_raises_value_error(tmp_path):
+    # Test that a checkpoint is only restored into a network with the same configuration.
+    
+    SensorNetwork(10, (100, 100), engine = "matrix", seed = 1).save_checkpoint(tmp_path / "checkpoint.npz")
+    
+    with pytest.raises(ValueError, match = 'The checkpoint nr_sensors 10 does not match the network nr_sensors 8.'):
+        SensorNetwork(8, (100, 100), engine = "matrix", seed = 1).load_checkpoint(tmp_path / "checkpoint.npz")
+    with pytest.raises(ValueError, match = 'The checkpoint engine matrix does not match the network engine sparse.'):
+        SensorNetwork(10, (100, 100), engine = "sparse", seed = 1).load_checkpoint(tmp_path / "checkpoint.npz")
+    with pytest.raises(ValueError, match = 'The checkpoint random generators'):
+        SensorNetwork(10, (100, 100), engine = "matrix", mobility = NoMobility(rng = np.random.default_rng(0)), seed = 1).load_checkpoint(tmp_path / "checkpoint.npz")
+
+def test_sparse_engine_caches_deterministic_loss():
+    # Test that the sparse engine keeps the loss of static deterministic links and recalculates the links of flagged sensors.
+    
+    params = dict(loss = "LDPL", n0 = 2.2, radio = "ESP32-WROOM-32U", engine = "sparse", seed = 3)
+    net = SensorNetwork(20, (200, 200), **params)
+    steps = iter(net)
+    next(steps)
+    mean = net.link_sparse._mean
+    next(steps)
+    assert net.link_sparse._mean is mean
+    
+    net.sensors[4].frequency = 933e6
+    net.sensors[7].set_txpower(-12.0)
+    _, _, _, status, loss = next(steps)
+    
+    expected = SensorNetwork(20, (200, 200), **params)
+    expected.sensors[4].frequency = 933e6
+    expected.sensors[7].set_txpower(-12.0)
+    _, _, _, expected_status, expected_loss = next(iter(expected))
+    assert np.array_equal(loss[0], expected_loss[0]) and np.array_equal(status[0], expected_status[0])
+    assert np.array_equal(loss[1][0], expected_loss[1][0]) and np.array_equal(loss[1][1], expected_loss[1][1])
+
+@pytest.mark.parametrize("engine, mobility", [("matrix", "None"), ("matrix", "GaussMarkov"), ("sparse", "RandomWalk")])
+def test_single_precision_matches_double_precision(engine, mobility):
+    # Test that single precision networks stay close to double precision networks and store single precision arrays.
+    
+    params = dict(loss = "TSPL", sigma = 6.0, radio = ["DEFAULT", "ESP32-WROOM-32U"]*10, consumption = "Exponential", scaling = 20.0, 
+        engine = engine, mobility = mobility, seed = 1, output = "array")
+    double = SensorNetwork(20, (300, 300), **params)
+    single = SensorNetwork(20, (300, 300), dtype = np.float32, **params)
+    assert single.state.positions.dtype == np.float32 and single.state.residual.dtype == np.float32
+    
+    for expected, outputs in zip(double.advance(5, record = ("positions", "residuals")).values(), single.advance(5, record = ("positions", "residuals")).values()):
+        assert outputs.dtype == np.float32
+        assert np.allclose(outputs, expected, rtol = 1e-5, atol = 1e-3)
+    
+    for _, (_, _, _, status, loss), (_, _, _, expected_status, expected_loss) in zip(range(3), single, double):
+        if engine == "sparse":
+            (status, pairs), (loss, _), (expected_status, expected_pairs), (expected_loss, _) = status, loss, expected_status, expected_loss
+            assert np.array_equal(pairs[0], expected_pairs[0]) and np.array_equal(pairs[1], expected_pairs[1])
+        else:
+            assert single.link_matrix._loss.dtype == np.float32 and single.link_matrix.distance.dtype == np.float32
+        assert loss.dtype == np.float32 and expected_loss.dtype == np.float64
+        assert np.allclose(loss, expected_loss, rtol = 0, atol = 1e-3)
+        #the status only differs for links within rounding of the sensitivity
+        assert np.count_nonzero(status != expected_status) <= 1
+    
+    with pytest.raises(ValueError, match = 'The dtype float16 is not supported. '):
+        SensorNetwork(5, (100, 100), dtype = np.float16)
+
+@pytest.mark.parametrize("loss", ["FSPL", "TSPL"])
+def test_single_precision_steps_allocate_less_memory(loss):
+    # Test that the steps of the matrix engine allocate a few arrays of links, halved by single precision.
+    
+    nr_sensors = 600
+    peaks = {}
+    for dtype in (np.float64, np.float32):
+        net = SensorNetwork(nr_sensors, (300, 300), loss = loss, sigma = 6.0, engine = "matrix", mobility = "RandomWalk", dtype = dtype, seed = 1)
+        net.advance(1)
+        tracemalloc.start()
+        net.advance(1)
+        _, peaks[dtype] = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert peaks[dtype] <= 4*nr_sensors**2*np.dtype(dtype).itemsize
+    assert peaks[np.float32] < 0.6*peaks[np.float64]
+
+@pytest.mark.parametrize("output", ["list", "array", "packed"])
+def test_converted_outputs_do_not_share_engine_buffers(output):
+    # Test that the converted outputs of the matrix engine are new objects, unchanged by the next steps.
+    
+    net = SensorNetwork(10, (100, 100), loss = "LDPL", sigma = 8.7, engine = "matrix", seed = 1, output = output)
+    steps = iter(net)
+    _, _, _, status, loss = next(steps)
+    expected_status, expected_loss = np.array(status), np.array(loss)
+    next(steps)
+    
+    assert np.array_equal(status, expected_status) and np.array_equal(loss, expected_loss)
+    if output != "list":
+        assert not np.shares_memory(status, net.link_matrix._status)
+        assert not np.shares_memory(loss, net.link_matrix._loss)
+
+@pytest.mark.parametrize("engine", ["loop", "matrix", "sparse"])
+def test_links_follow_model_parameters(engine):
+    # Test that changing a parameter of the propagation model between steps recalculates the cached losses.
+    
+    net = SensorNetwork(10, (100, 100), loss = "LDPL", n0 = 2.0, engine = engine, seed = 2, output = None if engine == "loop" else "array")
+    iterator = iter(net)
+    next(iterator)
+    net._link_model.n0 = 4.0
+    _, _, _, status, loss = next(iterator)
+    
+    if engine == "sparse":
+        loss, (rx, tx) = loss
+    else:
+        rx, tx = np.nonzero(~np.eye(10, dtype = bool))
+        loss = np.asarray(loss)[rx, tx]
+    positions = net.state.positions
+    distance = np.linalg.norm(positions[rx] - positions[tx], axis = -1)
+    assert len(loss) > 0
+    assert np.allclose(loss, LogDistance(n0 = 4.0).mean_loss(distance, net.state.frequency[tx]), rtol = 1e-12)
+
+def test_matrix_engine_yields_integer_status():
+    # Test that the default output of the matrix engine keeps an integer status, as the other engines.
+    
+    net = SensorNetwork(10, (100, 100), loss = "LDPL", sigma = 4.0, engine = "matrix", seed = 1)
+    assert net.link_matrix._status.dtype == bool
+    
+    _, _, _, status, _ = next(iter(net))
+    assert status.dtype.kind == "i" and status.shape == (10, 10)
+    assert net.advance(2, record = "status")["status"].dtype.kind == "i"
+    assert net.advance(1)[3].dtype.kind == "i"
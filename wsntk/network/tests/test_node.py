@@ -5,9 +5,10 @@
 # This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
 
 import pytest
+import numpy as np
 
 from wsntk import network
-from wsntk.network import SensorNode, RADIO_CONFIG
+from wsntk.network import SensorNode, SensorState, RADIO_CONFIG
 
 def test_sensor_node():
     # Test SensorNode creation with default values.
@@ -111,4 +112,35 @@ def test_get_rx_sensitivity():
 
     sensor = SensorNode(dimensions = (10.0, 10.0), radio = "ESP32-WROOM-32U")
     assert sensor.get_rxsensitivity() == parameters["rx_sensitivity"]
-    
\ No newline at end of file
+    
+def test_sensor_node_is_a_view_onto_state():
+    # Test that a sensor reads and writes its row of a shared state.
+    
+    state = SensorState(2, 2)
+    sensor = SensorNode(dimensions = (10.0, 10.0), radio = "ESP32-WROOM-32U", state = state, index = 1)
+    
+    parameters = RADIO_CONFIG["ESP32-WROOM-32U"]
+    assert state.tx_power[1] == parameters["max_tx_power"]
+    assert state.residual[1] == 100
+    assert state.tx_power[0] == 0
+    
+    sensor.set_txpower(0.0)
+    sensor.set_position((1.0, 2.0))
+    assert state.tx_power[1] == 0.0
+    assert np.array_equal(state.positions[1], (1.0, 2.0))
+
+def test_register_radio():
+    # Test that a registered radio configures sensors and that invalid radios raise ValueError.
+    network.register_radio("lora-sx1276", -4.0, 20.0, -137.0, 915e6)
+    try:
+        sensor = SensorNode(dimensions = (10.0, 10.0), radio = "LoRa-SX1276")
+        assert sensor.max_tx_power == 20.0 and sensor.tx_power == 20.0
+        assert sensor.min_tx_power == -4.0
+        assert sensor.rx_sensitivity == -137.0
+        assert sensor.frequency == 915e6
+    finally:
+        del RADIO_CONFIG["LORA-SX1276"]
+    
+    with pytest.raises(ValueError, match = 'The minimum transmission power 20.0 is above the maximum 10.0.'):
+        network.register_radio("broken", 20.0, 10.0, -90.0, 2.4e9)
+    assert "BROKEN" not in RADIO_CONFIG
@@ -0,0 +1,64 @@
+# Author: Edielson P. Frigieri <edielsonpf@gmail.com>
+#
+# License: MIT
+
+import pytest
+import numpy as np
+
+from wsntk.network import Router, SensorNetwork
+
+def _check_tree(router, sink, next_hop, cost):
+	# Check that every route follows links that are up and adds up to its cost.
+	for sensor in np.flatnonzero(next_hop >= 0):
+		assert router.weights[next_hop[sensor], sensor] < np.inf
+		assert np.isclose(cost[sensor], cost[next_hop[sensor]] + router.weights[next_hop[sensor], sensor])
+	assert cost[sink] == 0
+
+def test_router_small_graph():
+	# Test the routes of a small graph when a link goes down.
+	
+	status = np.zeros((4, 4), dtype = int)
+	loss = np.zeros((4, 4))
+	#links towards the sink 0: 1 -> 0, 2 -> 1, 2 -> 0 (expensive), 3 -> 2
+	for rx, tx, value in ((0, 1, 10.0), (1, 2, 10.0), (0, 2, 50.0), (2, 3, 5.0)):
+		status[rx, tx] = 1
+		loss[rx, tx] = value
+	
+	router = Router(4)
+	router.update(status, loss)
+	next_hop, cost = router.route(0)
+	assert next_hop.tolist() == [-1, 0, 1, 2]
+	assert cost.tolist() == [0.0, 10.0, 20.0, 25.0]
+	assert router.path(3, 0) == [3, 2, 1, 0]
+	
+	status[1, 2] = 0
+	router.update(status, loss)
+	next_hop, cost = router.route(0)
+	assert next_hop.tolist() == [-1, 0, 0, 2]
+	assert cost.tolist() == [0.0, 10.0, 50.0, 55.0]
+	
+	hops = Router(4, metric = "hops")
+	hops.update(status)
+	assert hops.route(0)[1].tolist() == [0, 1, 1, 2]
+	assert hops.path(0, 3) == []
+
+@pytest.mark.parametrize("metric", ["loss", "hops"])
+def test_cached_trees_match_new_trees(metric):
+	# Test that the repaired trees have the costs of trees built from scratch.
+	
+	net = SensorNetwork(30, (200, 200), loss = "LDPL", n0 = 3.0, sigma = 2.0, radio = "ESP32-WROOM-32U", engine = "matrix", seed = 9, mobility = "RandomWalk", speed = 10.0)
+	router = Router(30, metric)
+	for step, (_, _, _, status, loss) in zip(range(10), net):
+		router.update(status, loss)
+		fresh = Router(30, metric)
+		fresh.update(status, loss)
+		for sink in (0, 7):
+			next_hop, cost = router.route(sink)
+			assert np.allclose(cost, fresh.route(sink)[1], rtol = 1e-12, equal_nan = False)
+			_check_tree(router, sink, next_hop, cost)
+
+def test_router_with_unknown_metric_raises_value_error():
+	# Test that an unknown metric is rejected.
+	
+	with pytest.raises(ValueError, match='The routing metric energy is not supported. '):
+		Router(5, "energy")
@@ -1,3 +1,6 @@
 from ._simulator import SimuNet
+from ._sweep import sweep, parameter_grid
+from ._recorder import StepRecorder, StepRecording
+from ._events import EventScheduler
 
-__all__ = ['SimuNet']
\ No newline at end of file
+__all__ = ['SimuNet', 'sweep', 'parameter_grid', 'StepRecorder', 'StepRecording', 'EventScheduler']
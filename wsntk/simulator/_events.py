@@ -0,0 +1,172 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""Event-driven simulation of sensor networks."""
+
+from wsntk.network._sensor import SENSOR_MIN_ENERGY
+
+import heapq
+import itertools
+import numpy as np
+
+class EventScheduler(object):
+	"""
+	Event scheduler class.
+	This class drives a sensor network from event to event instead of step by step. The events are kept
+	in a heap ordered by step: the deaths of the sensors, predicted in closed form by the consumption
+	model, and the changes scheduled by the user. Between two events only energy is consumed, so the
+	skipped steps are calculated at once and only the steps with events are simulated, where the links
+	are recalculated for the sensors touched by the events.
+
+	The snapshots agree with the stepped simulator at the event steps, up to rounding of the residual
+	energy, when the propagation model is deterministic. The shadowing of the skipped steps is not drawn.
+
+	Required arguments:
+
+		*network*:
+			SensorNetwork, the simulated network. It should not be iterated while driven by the scheduler.
+
+	Optional arguments:
+
+		*deltas*:
+			Boolean, yield the links that changed since the previous event instead of the outputs of the network.
+	"""
+
+	#user events, named after the sensor attribute they set, and their state column
+	event_columns = {"position": "positions", "tx_power": "tx_power", "rx_sensitivity": "rx_sensitivity", "frequency": "frequency", "residual": "residual"}
+
+	def __init__(self, network, deltas = False):
+
+		if network.replicas is not None:
+			raise ValueError("Replicas are not supported by the event scheduler.")
+		if network.mob_model.mobile:
+			raise ValueError("Mobile sensors are not supported by the event scheduler, use position events.")
+		if deltas and network.engine == "sparse":
+			raise ValueError("Deltas are not supported by the sparse engine.")
+
+		self.network = network
+		self.deltas = deltas
+		self.step = 0
+		self._queue = []
+		#breaks the ties between events of the same step in scheduling order
+		self._counter = itertools.count()
+		#deaths predicted before a change of the sensor are discarded
+		self._version = np.zeros(len(network.state), dtype = int)
+		self._status = None
+		self._loss = None
+		self._schedule_deaths(np.arange(len(network.state)))
+
+	def schedule(self, step, kind, sensor, value):
+		"""
+		Schedule a change of a sensor
+
+		Parameters
+		----------
+		step : {integer}
+			The step at which the change is applied, before the sensors are updated as between two
+			iterations of the stepped simulator
+
+		kind : {string}
+			The changed attribute: "position" (a waypoint), "tx_power", "rx_sensitivity", "frequency" or "residual"
+
+		sensor : {integer}
+			The index of the sensor
+
+		value : {double or array_like}
+			The new value of the attribute
+
+		Returns
+		-------
+		No data returned
+		"""
+		if kind not in self.event_columns:
+			raise ValueError("The event %s is not supported. " % kind)
+		if step <= self.step:
+			raise ValueError("Events must be scheduled after step %s." % self.step)
+
+		heapq.heappush(self._queue, (step, next(self._counter), kind, sensor, value))
+
+	def _schedule_deaths(self, index):
+		"""Predict the step at which each active sensor in `index` runs out of energy."""
+		state = self.network.state
+		self._version[index] += 1
+
+		alive = index[state.activity[index].astype(bool)]
+		steps = np.atleast_1d(self.network.cons_model.steps_to_threshold(state.residual[alive], state.tx_power[alive], SENSOR_MIN_ENERGY))
+		for sensor, steps_left in zip(alive, steps):
+			if steps_left < np.inf:
+				heapq.heappush(self._queue, (self.step + max(int(steps_left), 1), next(self._counter), "death", sensor, self._version[sensor]))
+
+	def _stale(self, event):
+		"""Check if an event is a death predicted before a change of its sensor."""
+		_, _, kind, sensor, version = event
+		return kind == "death" and version != self._version[sensor]
+
+	def _deltas(self, outputs):
+		"""Find the links whose status or loss changed since the previous event."""
+		status, loss = np.asarray(outputs[3]), np.asarray(outputs[4])
+		if self._status is None:
+			self._status, self._loss = np.zeros_like(status), np.zeros_like(loss)
+
+		rx, tx = np.nonzero((status != self._status) | (loss != self._loss))
+		self._status, self._loss = status, loss
+		return rx, tx, status[rx, tx], loss[rx, tx]
+
+	def __iter__(self):
+		"""Interator"""
+		return self
+
+	def __next__(self):
+		"""
+		Advance to the next event
+
+		Returns
+		-------
+		tuple
+			(step, events, outputs) where `events` lists the (kind, sensor, value) changes applied at `step`,
+			followed by the ("death", sensor, None) events of the sensors that ran out of energy, and `outputs`
+			are the outputs of the network at `step`. With `deltas`, `outputs` is replaced by the
+			(rx, tx, status, loss) arrays of the links that changed since the previous event.
+		"""
+		queue = self._queue
+		while queue and self._stale(queue[0]):
+			heapq.heappop(queue)
+		if not queue:
+			raise StopIteration
+
+		step = queue[0][0]
+		changes = []
+		due = []
+		while queue and queue[0][0] == step:
+			event = heapq.heappop(queue)
+			if event[2] != "death":
+				changes.append(event[2:])
+			elif not self._stale(event):
+				due.append(event[3])
+
+		network = self.network
+		state = network.state
+		#the skipped steps only consume energy
+		state.residual *= network.cons_model.decay(state.tx_power, step - 1 - self.step)
+
+		for kind, sensor, value in changes:
+			column = self.event_columns[kind]
+			getattr(state, column)[sensor] = value
+			if column in state.tracked:
+				state.touch(sensor)
+
+		alive = state.activity.astype(bool)
+		outputs = network.advance(1)
+		self.step = step
+
+		died = np.flatnonzero(alive & ~state.activity.astype(bool))
+		events = changes + [("death", int(sensor), None) for sensor in died]
+		#deaths are predicted again for the changed sensors and for those that survived their prediction
+		self._schedule_deaths(np.unique(np.array([sensor for _, sensor, _ in changes] + due, dtype = int)))
+
+		if self.deltas:
+			return step, events, self._deltas(outputs)
+		return step, events, outputs
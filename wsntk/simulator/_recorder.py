@@ -0,0 +1,199 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""On-disk recording of sensor network simulations."""
+
+import json
+import os
+import numpy as np
+
+FIELDS = ("positions", "residuals", "activities", "status", "loss")
+
+class StepRecorder(object):
+	"""
+	Step recorder class.
+	This class streams the outputs of a sensor network into memory-mapped ``.npy`` files, so the history of
+	long runs does not need to fit in memory. Each field is stored in chunks of `chunk_size` steps, one
+	preallocated file per chunk, and a manifest describing the recording is rewritten on every flush.
+
+	Required arguments:
+
+		*path*:
+			String, the directory of the recording. It is created if missing.
+
+	Optional arguments:
+
+		*chunk_size*:
+			Integer, the number of steps of each chunk file.
+
+		*flush_every*:
+			Integer, the number of steps between flushes to disk.
+
+		*fields*:
+			Tuple of strings, the recorded fields among "positions", "residuals", "activities", "status" and "loss".
+	"""
+
+	def __init__(self, path, chunk_size = 1024, flush_every = 100, fields = FIELDS):
+
+		for field in fields:
+			if field not in FIELDS:
+				raise ValueError("The field %s is not supported. " % field)
+
+		self.path = path
+		self.chunk_size = chunk_size
+		self.flush_every = flush_every
+		self.fields = tuple(fields)
+		self.count = 0
+		self._chunks = {}
+		self._layout = {}
+		os.makedirs(path, exist_ok = True)
+
+	def _open_chunk(self, field, number):
+		"""Create the preallocated file of a chunk."""
+		shape, dtype = self._layout[field]
+		filename = os.path.join(self.path, "%s_%06d.npy" % (field, number))
+		return np.lib.format.open_memmap(filename, mode = "w+", dtype = dtype, shape = (self.chunk_size,) + shape)
+
+	def record(self, positions, residuals, activities, status, loss, *metrics):
+		"""
+		Record the outputs of one simulation step
+
+		Parameters
+		----------
+		positions, residuals, activities, status, loss : {array_like}
+			The outputs of one step of a ``SensorNetwork``, with dense status and loss
+
+		metrics : {dict}
+			The connectivity metrics that follow the outputs of networks maintaining them, not recorded
+
+		Returns
+		-------
+		No data returned
+		"""
+		values = dict(zip(FIELDS, (positions, residuals, activities, status, loss)))
+		number, row = divmod(self.count, self.chunk_size)
+
+		for field in self.fields:
+			if isinstance(values[field], tuple):
+				raise ValueError("The field %s is sparse, only dense outputs can be recorded. " % field)
+			value = np.asarray(values[field])
+			if field not in self._layout:
+				self._layout[field] = (value.shape, value.dtype)
+			if row == 0:
+				if field in self._chunks:
+					self._chunks[field].flush()
+				self._chunks[field] = self._open_chunk(field, number)
+			self._chunks[field][row] = value
+
+		self.count += 1
+		if self.count % self.flush_every == 0:
+			self.flush()
+
+	def flush(self):
+		"""
+		Write the pending steps and the manifest to disk
+
+		Parameters
+		----------
+		No parameters
+
+		Returns
+		-------
+		No data returned
+		"""
+		for chunk in self._chunks.values():
+			chunk.flush()
+
+		manifest = {
+			"count": self.count,
+			"chunk_size": self.chunk_size,
+			"fields": {field: {"shape": list(shape), "dtype": dtype.str} for field, (shape, dtype) in self._layout.items()},
+		}
+		filename = os.path.join(self.path, "manifest.json")
+		with open(filename + ".tmp", "w") as file:
+			json.dump(manifest, file)
+		os.replace(filename + ".tmp", filename)
+
+	def close(self):
+		"""
+		Flush the recording and release the chunk files
+
+		Parameters
+		----------
+		No parameters
+
+		Returns
+		-------
+		No data returned
+		"""
+		self.flush()
+		self._chunks = {}
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+
+class StepRecording(object):
+	"""
+	Step recording class.
+	This class gives random access to the steps of a recording written by ``StepRecorder``.
+	Only the chunk holding the requested step is mapped in memory.
+
+	Required arguments:
+
+		*path*:
+			String, the directory of the recording.
+	"""
+
+	def __init__(self, path):
+
+		self.path = path
+		with open(os.path.join(path, "manifest.json")) as file:
+			manifest = json.load(file)
+		self.count = manifest["count"]
+		self.chunk_size = manifest["chunk_size"]
+		self.fields = tuple(manifest["fields"])
+		self._chunks = {}
+
+	def __len__(self):
+		return self.count
+
+	def read(self, field, step):
+		"""
+		Read one field of one step
+
+		Parameters
+		----------
+		field : {string}
+			The name of the field
+
+		step : {integer}
+			The step number, starting from 0. Negative numbers count from the end.
+
+		Returns
+		-------
+		ndarray
+			The recorded value
+		"""
+		if field not in self.fields:
+			raise ValueError("The field %s was not recorded. " % field)
+		if step < 0:
+			step += self.count
+		if not 0 <= step < self.count:
+			raise IndexError("Step %s out of range, the recording has %s steps." % (step, self.count))
+
+		#only the last chunk read of each field is kept mapped
+		number, row = divmod(step, self.chunk_size)
+		if self._chunks.get(field, (None,))[0] != number:
+			self._chunks[field] = (number, np.load(os.path.join(self.path, "%s_%06d.npy" % (field, number)), mmap_mode = "r"))
+		return np.array(self._chunks[field][1][row])
+
+	def __getitem__(self, step):
+		"""Read all the fields of one step as a dictionary."""
+		return {field: self.read(field, step) for field in self.fields}
@@ -0,0 +1,171 @@
+# coding: utf-8
+#
+# Copyright (C) 2020 wsn-toolkit
+#
+# This program was written by Edielson P. Frigieri <edielsonpf@gmail.com>
+
+"""Parameter sweeps over sensor network simulations."""
+
+from wsntk.network import SensorNetwork
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import itertools
+import json
+import os
+import numpy as np
+
+def parameter_grid(grid):
+	"""
+	Expand a parameter grid into the list of configurations of a sweep.
+
+	Parameters
+	----------
+	grid : dict or list of dict
+	   Maps ``SimuNet`` parameters to lists of values. Every combination of values is a configuration.
+	   A list of grids is expanded grid by grid.
+
+	Returns
+	-------
+	list of dict
+		The configurations, in a fixed order that identifies each run of the sweep.
+	"""
+	if isinstance(grid, dict):
+		grid = [grid]
+
+	configurations = []
+	for sub_grid in grid:
+		names = list(sub_grid)
+		for values in itertools.product(*(sub_grid[name] for name in names)):
+			configurations.append(dict(zip(names, values)))
+
+	return configurations
+
+def _run(params, steps, seed):
+	"""
+	Run one configuration of a sweep and summarize it.
+
+	Parameters
+	----------
+	params : dict
+	   The ``SimuNet`` parameters.
+
+	steps: int
+		The number of simulation steps.
+
+	seed: SeedSequence
+		The seed of the run.
+
+	Returns
+	-------
+	dict
+		The summary metrics of the run: the number of steps, the first step with an inactive sensor
+		(None if all sensors survived), the final number of active sensors, the final mean residual
+		energy and the mean number of links up per step.
+	"""
+	net = SensorNetwork(seed = seed, **params)
+
+	first_death = None
+	links = 0
+	step = 0
+	for step, (_, _, activities, status, _, *_) in zip(range(1, steps + 1), net):
+		if first_death is None and not np.all(activities):
+			first_death = step
+		#the sparse engine returns the status as (data, (rx, tx))
+		if isinstance(status, tuple):
+			status = status[0]
+		links += np.sum(status)
+
+	return {
+		"steps": step,
+		"first_death": first_death,
+		"alive": np.sum(net.state.activity, axis = -1).tolist(),
+		"residual": np.mean(net.state.residual, axis = -1).tolist(),
+		"links": float(links/step) if step else 0.0,
+	}
+
+def _read_log(log):
+	"""Read the runs already recorded in a sweep log."""
+	done = {}
+	if log is not None and os.path.exists(log):
+		with open(log) as file:
+			for line in file:
+				if line.strip():
+					record = json.loads(line)
+					done[record["run"]] = record
+	return done
+
+def sweep(grid, steps, seed = None, max_workers = None, log = None):
+	"""
+	Run a sweep of sensor network simulations over a parameter grid.
+
+	Runs are distributed over a pool of processes. Each run draws from its own seed, spawned from `seed`
+	by a ``SeedSequence`` according to the run position in the grid, so the results do not depend on the
+	number of workers nor on the completion order.
+
+	Parameters
+	----------
+	grid : dict or list of dict
+	   Maps ``SimuNet`` parameters, including `nr_sensors` and `dimensions`, to lists of values.
+	   See ``parameter_grid``.
+
+	steps: int
+		The step budget of each run.
+
+	seed: int or SeedSequence
+		The root seed of the sweep. A random root is used when omitted.
+
+	max_workers: int
+		The number of worker processes, all the processors by default. With 1 the runs are executed
+		in the calling process.
+
+	log: string
+		Path to a JSON lines file where each finished run is appended. Runs already in the file are
+		skipped, so an interrupted sweep is resumed by calling ``sweep`` again with the same arguments.
+		When the sweep is closed early, the runs not started are cancelled and the runs already running
+		are logged once they finish. A log recorded with another seed or grid raises ``ValueError``.
+
+	Yields
+	------
+	tuple
+		(run, params, metrics) for each run, as soon as it finishes, where `run` is the position of
+		`params` in the grid and `metrics` is the summary of the run.
+	"""
+	configurations = parameter_grid(grid)
+	done = _read_log(log)
+	#a resumed sweep without an explicit seed reuses the root entropy of the log
+	if seed is None and done:
+		seed = next(iter(done.values()))["entropy"]
+	root = np.random.SeedSequence(seed)
+	seeds = root.spawn(len(configurations))
+	for run, record in done.items():
+		if record["entropy"] != root.entropy:
+			raise ValueError("The sweep log %s was recorded with another seed. " % log)
+		#the parameters are compared as they are written in the log
+		if run >= len(configurations) or record["params"] != json.loads(json.dumps(configurations[run])):
+			raise ValueError("The run %s of the sweep log %s does not match the grid. " % (run, log))
+	pending = [run for run in range(len(configurations)) if run not in done]
+
+	def _record(run, metrics):
+		if log is not None:
+			with open(log, "a") as file:
+				file.write(json.dumps({"run": run, "entropy": root.entropy, "params": configurations[run], "metrics": metrics}) + "\n")
+		return run, configurations[run], metrics
+
+	if max_workers == 1:
+		for run in pending:
+			yield _record(run, _run(configurations[run], steps, seeds[run]))
+		return
+
+	executor = ProcessPoolExecutor(max_workers = max_workers)
+	futures = {executor.submit(_run, configurations[run], steps, seeds[run]): run for run in pending}
+	try:
+		for future in as_completed(futures):
+			run = futures.pop(future)
+			yield _record(run, future.result())
+	finally:
+		#a sweep closed early does not wait for the runs not started, the runs already 
+		#finished or running are logged so a resumed sweep skips them
+		executor.shutdown(cancel_futures = True)
+		for future, run in futures.items():
+			if not future.cancelled() and future.exception() is None:
+				_record(run, future.result())
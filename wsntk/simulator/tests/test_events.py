@@ -0,0 +1,74 @@
+# Author: Edielson P. Frigieri <edielsonpf@gmail.com>
+#
+# License: MIT
+
+import pytest
+import numpy as np
+
+from wsntk.network import SensorNetwork
+from wsntk.simulator import EventScheduler
+
+PARAMS = dict(loss = "LDPL", n0 = 3.0, radio = "ESP32-WROOM-32U", consumption = "Exponential", scaling = 2.0, engine = "matrix", seed = 4)
+CHANGES = [(5, "tx_power", 2, 20.0), (9, "position", 0, (10.0, 10.0)), (9, "tx_power", 7, 5.0)]
+
+def _stepped(steps):
+	# Run the stepped simulator applying the changes between iterations.
+	net = SensorNetwork(8, (100, 100), **PARAMS)
+	outputs = []
+	for step in range(1, steps + 1):
+		for change_step, kind, sensor, value in CHANGES:
+			if change_step == step:
+				setattr(net.sensors[sensor], kind, value)
+		outputs.append(next(iter(net)))
+	return outputs
+
+def test_events_match_stepped_simulation():
+	# Test that the snapshots of the event scheduler agree with the stepped simulator.
+	
+	scheduler = EventScheduler(SensorNetwork(8, (100, 100), **PARAMS))
+	for change in CHANGES:
+		scheduler.schedule(*change)
+	
+	snapshots = list(scheduler)
+	steps = [step for step, _, _ in snapshots]
+	assert steps == sorted(set(steps))
+	assert {5, 9} <= set(steps)
+	
+	stepped = _stepped(steps[-1])
+	deaths = 0
+	for step, events, (positions, residuals, activities, status, loss) in snapshots:
+		expected = stepped[step - 1]
+		assert np.array_equal(positions, expected[0])
+		assert np.allclose(residuals, expected[1], rtol = 1e-9)
+		assert np.array_equal(activities, expected[2])
+		assert np.array_equal(status, expected[3])
+		assert np.array_equal(loss, expected[4])
+		
+		#every death is reported at the step it happens
+		previous = np.asarray(stepped[step - 2][2]) if step > 1 else np.ones(8)
+		died = [sensor for kind, sensor, _ in events if kind == "death"]
+		assert np.array_equal(np.flatnonzero(previous > np.asarray(expected[2])), died)
+		deaths += len(died)
+	
+	assert deaths == 8
+	assert not np.any(snapshots[-1][2][2])
+
+def test_event_deltas():
+	# Test that the deltas hold the links changed since the previous event.
+	
+	scheduler = EventScheduler(SensorNetwork(8, (100, 100), **PARAMS), deltas = True)
+	status = np.zeros((8, 8), dtype = int)
+	for step, events, (rx, tx, changed_status, changed_loss) in scheduler:
+		status[rx, tx] = changed_status
+	
+	assert not np.any(status)
+
+def test_schedule_rejects_invalid_events():
+	# Test that unknown events and events in the past are rejected.
+	
+	scheduler = EventScheduler(SensorNetwork(4, (100, 100), **PARAMS))
+	
+	with pytest.raises(ValueError, match='The event color is not supported. '):
+		scheduler.schedule(3, "color", 0, 1)
+	with pytest.raises(ValueError, match='Events must be scheduled after step 0.'):
+		scheduler.schedule(0, "tx_power", 0, 10.0)
@@ -0,0 +1,67 @@
+# Author: Edielson P. Frigieri <edielsonpf@gmail.com>
+#
+# License: MIT
+
+import pytest
+import numpy as np
+
+from wsntk import simulator
+from wsntk.simulator import SimuNet, StepRecorder, StepRecording
+
+def test_recorder_random_access(tmp_path):
+	# Test reading back any step of a recording spanning several chunks.
+
+	net = SimuNet(5, dimensions = (100, 100), loss = "LDPL", sigma = 8.7, consumption = "Exponential", scaling = 1.0, seed = 1)
+	outputs = []
+	with StepRecorder(str(tmp_path), chunk_size = 4, flush_every = 3) as recorder:
+		for step, output in zip(range(10), net):
+			recorder.record(*output)
+			outputs.append(output)
+	
+	recording = StepRecording(str(tmp_path))
+	assert len(recording) == 10
+	for step in (0, 5, 9, 3):
+		for field, value in zip(("positions", "residuals", "activities", "status", "loss"), outputs[step]):
+			assert np.array_equal(recording[step][field], value)
+	assert np.array_equal(recording.read("loss", -1), outputs[-1][4])
+
+def test_recorder_ignores_connectivity_metrics(tmp_path):
+	# Test recording the steps of a network that also yields its connectivity metrics.
+
+	net = SimuNet(5, dimensions = (100, 100), engine = "matrix", connectivity = True, seed = 1)
+	outputs = []
+	with StepRecorder(str(tmp_path)) as recorder:
+		for step, output in zip(range(3), net):
+			assert len(output) == 6
+			recorder.record(*output)
+			outputs.append(output)
+	
+	recording = StepRecording(str(tmp_path))
+	assert len(recording) == 3
+	assert np.array_equal(recording[2]["status"], outputs[2][3])
+
+def test_recorder_selected_fields(tmp_path):
+	# Test recording a subset of the fields of the matrix engine.
+
+	net = SimuNet(5, dimensions = (100, 100), engine = "matrix", seed = 1)
+	with StepRecorder(str(tmp_path), fields = ("residuals", "status")) as recorder:
+		for step, output in zip(range(3), net):
+			recorder.record(*output)
+	
+	recording = StepRecording(str(tmp_path))
+	assert recording.fields == ("residuals", "status")
+	assert recording[2]["status"].shape == (5, 5)
+	
+	with pytest.raises(ValueError, match = 'The field loss was not recorded.'):
+		recording.read("loss", 0)
+	with pytest.raises(IndexError):
+		recording.read("status", 3)
+
+def test_recorder_rejects_sparse_outputs(tmp_path):
+	# Test that the coordinate outputs of the sparse engine are rejected.
+
+	net = SimuNet(5, dimensions = (100, 100), engine = "sparse", seed = 1)
+	recorder = StepRecorder(str(tmp_path))
+	
+	with pytest.raises(ValueError, match = 'The field status is sparse'):
+		recorder.record(*next(net))
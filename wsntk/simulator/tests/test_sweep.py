@@ -0,0 +1,79 @@
+# Author: Edielson P. Frigieri <edielsonpf@gmail.com>
+#
+# License: MIT
+
+import pytest
+import json
+
+from wsntk import simulator
+from wsntk.simulator import sweep, parameter_grid
+
+GRID = {"nr_sensors": [6], "dimensions": [(100, 100)], "loss": ["LDPL"], "sigma": [0.0, 8.7], "consumption": ["Exponential"], "scaling": [10.0, 20.0], "engine": ["matrix"]}
+
+def test_parameter_grid():
+	# Test the expansion of a grid into configurations.
+
+	configurations = parameter_grid([{"sigma": [0.0, 8.7], "n0": [2.0, 3.0]}, {"loss": ["FSPL"]}])
+	
+	assert len(configurations) == 5
+	assert configurations[0] == {"sigma": 0.0, "n0": 2.0}
+	assert configurations[-1] == {"loss": "FSPL"}
+
+def test_sweep_serial_and_parallel_match():
+	# Test that the results do not depend on the number of workers.
+
+	serial = {run: metrics for run, _, metrics in sweep(GRID, steps = 5, seed = 1, max_workers = 1)}
+	parallel = {run: metrics for run, _, metrics in sweep(GRID, steps = 5, seed = 1, max_workers = 2)}
+	
+	assert len(serial) == 4
+	assert serial == parallel
+	assert serial[0]["steps"] == 5
+
+def test_sweep_resumes_from_log(tmp_path):
+	# Test that the runs recorded in the log are skipped.
+
+	log = str(tmp_path / "sweep.jsonl")
+	expected = {run: metrics for run, _, metrics in sweep(GRID, steps = 5, seed = 1, max_workers = 1)}
+	
+	first = sweep(GRID, steps = 5, seed = 1, max_workers = 1, log = log)
+	next(first)
+	next(first)
+	first.close()
+	
+	resumed = {run: metrics for run, _, metrics in sweep(GRID, steps = 5, max_workers = 1, log = log)}
+	assert sorted(resumed) == [2, 3]
+	
+	with open(log) as file:
+		records = [json.loads(line) for line in file]
+	assert {record["run"]: record["metrics"] for record in records} == expected
+
+def test_closed_parallel_sweep_logs_running_runs(tmp_path):
+	# Test that closing a parallel sweep cancels the runs not started and logs the runs already running.
+
+	log = str(tmp_path / "sweep.jsonl")
+	grid = dict(GRID, n0 = [2.0, 3.0])
+	expected = {run: metrics for run, _, metrics in sweep(grid, steps = 5, seed = 1, max_workers = 1)}
+	
+	first = sweep(grid, steps = 5, seed = 1, max_workers = 2, log = log)
+	next(first)
+	first.close()
+	
+	with open(log) as file:
+		logged = {record["run"]: record["metrics"] for record in map(json.loads, file)}
+	assert len(logged) >= 2
+	
+	resumed = {run: metrics for run, _, metrics in sweep(grid, steps = 5, max_workers = 2, log = log)}
+	assert not set(logged) & set(resumed)
+	logged.update(resumed)
+	assert logged == expected
+
+def test_sweep_log_of_another_sweep_raises_value_error(tmp_path):
+	# Test that a log recorded with another seed or grid is not resumed.
+
+	log = str(tmp_path / "sweep.jsonl")
+	list(sweep(GRID, steps = 5, seed = 1, max_workers = 1, log = log))
+	
+	with pytest.raises(ValueError, match = 'was recorded with another seed. '):
+		next(sweep(GRID, steps = 5, seed = 2, max_workers = 1, log = log))
+	with pytest.raises(ValueError, match = 'does not match the grid. '):
+		next(sweep(dict(GRID, sigma = [4.0, 8.7]), steps = 5, seed = 1, max_workers = 1, log = log))